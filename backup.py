@@ -0,0 +1,150 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+import database as db
+
+# Columns written for each task in exports (and accepted on import)
+EXPORT_TASK_COLUMNS = ("id", "parent_id", "skill", "description", "status", "deadline")
+CSV_COLUMNS = ("record",) + EXPORT_TASK_COLUMNS + ("streak_days", "last_login")
+
+# --- Online Backup ---
+
+def backup_database(dest_path, pages=64, sleep=0.01, progress=None):
+    """
+    Copies the live database to `dest_path` using SQLite's online backup API.
+    Only `pages` pages are copied per step and the source is unlocked between steps,
+    so other connections keep reading and writing while the backup runs.
+    """
+    folder = os.path.dirname(dest_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    # Write to a temporary file first so a failed backup never replaces a good one
+    tmp_path = dest_path + ".part"
+    source = db.connect_db()
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target, pages=pages, progress=progress, sleep=sleep)
+    finally:
+        target.close()
+        source.close()
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+def start_backup(dest_path, on_done=None, **kwargs):
+    """Runs backup_database() on a background thread; calls on_done(dest_path, error)."""
+    def run():
+        error = None
+        try:
+            backup_database(dest_path, **kwargs)
+        except (sqlite3.Error, OSError) as e:
+            error = e
+        if on_done:
+            on_done(dest_path, error)
+
+    t = threading.Thread(target=run, name="BackupThread", daemon=True)
+    t.start()
+    return t
+
+def default_backup_path(backup_dir="data/backups"):
+    """Returns a timestamped backup file name inside `backup_dir`."""
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(backup_dir, f"roadmap_tracker_{stamp}.db")
+
+# --- Streaming Export ---
+
+def _iter_export_records(user_id):
+    """Yields the user's progress record followed by one record per task, streaming from SQLite."""
+    db.flush_writes()
+    conn = db.connect_db()
+    try:
+        progress = conn.execute(
+            "SELECT streak_days, last_login FROM progress WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if progress:
+            yield {"record": "progress", "streak_days": progress["streak_days"], "last_login": progress["last_login"]}
+
+        # Archived tasks are exported too; ordering by id keeps parents ahead of their subtasks
+        columns = ", ".join(EXPORT_TASK_COLUMNS)
+        cursor = conn.execute(
+            f"SELECT {columns} FROM roadmap WHERE user_id = ? "
+            f"UNION ALL SELECT {columns} FROM roadmap_archive WHERE user_id = ? ORDER BY id",
+            (user_id, user_id)
+        )
+        for row in cursor:
+            record = {"record": "task"}
+            record.update(zip(EXPORT_TASK_COLUMNS, row))
+            yield record
+    finally:
+        conn.close()
+
+def export_user_data(user_id, path, fmt=None):
+    """Writes the user's roadmap and progress to `path` as CSV or JSON Lines. Returns the task count."""
+    fmt = fmt or _format_from_path(path)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            for record in _iter_export_records(user_id):
+                writer.writerow(record)
+                count += record["record"] == "task"
+        else:
+            for record in _iter_export_records(user_id):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += record["record"] == "task"
+    return count
+
+# --- Streaming Import ---
+
+def _iter_import_records(path, fmt):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def _task_values(user_id, record, parent_id):
+    if not record.get("skill"):
+        raise ValueError("Every imported task needs a 'skill'.")
+    status = 1 if str(record.get("status") or 0) == "1" else 0
+    return (user_id, record["skill"], record.get("description") or "", status, record.get("deadline") or None, parent_id)
+
+def import_user_data(user_id, path, fmt=None):
+    """
+    Appends the tasks in a CSV / JSON Lines export to the user's roadmap.
+    Records are streamed inside one transaction; only an old-id -> new-id map is
+    kept so subtasks can be re-attached to their parents. Returns the task count.
+    """
+    fmt = fmt or _format_from_path(path)
+    count = 0
+    new_ids = {}
+    with db.connect_db() as conn:
+        for record in _iter_import_records(path, fmt):
+            kind = record.get("record") or "task"
+            if kind == "progress":
+                conn.execute(
+                    "UPDATE progress SET streak_days = MAX(streak_days, ?) WHERE user_id = ?",
+                    (int(record.get("streak_days") or 0), user_id)
+                )
+            elif kind == "task":
+                parent_id = new_ids.get(str(record.get("parent_id") or ""))
+                cursor = conn.execute(
+                    "INSERT INTO roadmap (user_id, skill, description, status, deadline, parent_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    _task_values(user_id, record, parent_id)
+                )
+                if record.get("id") not in (None, ""):
+                    new_ids[str(record["id"])] = cursor.lastrowid
+                count += 1
+        db._rebuild_rollups(conn, user_id)
+        conn.commit()
+    return count
+
+def _format_from_path(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
@@ -0,0 +1,59 @@
+"""
+Compares sqlite3.Row results (fetch_tasks) with compact TaskRecords (fetch_task_records).
+
+Usage: python benchmarks/bench_task_records.py [num_tasks]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+
+def build_database(num_tasks):
+    db.setup_database()
+    user_id = db.create_user("bench", "Benchmark")
+    rows = (
+        (user_id, f"Module {i % 500} - Lesson {i % 40}", "Scheduled from imported roadmap.",
+         i % 3 == 0, f"2027-{i % 12 + 1:02d}-{i % 28 + 1:02d}")
+        for i in range(num_tasks)
+    )
+    with db.connect_db() as conn:
+        conn.executemany(
+            "INSERT INTO roadmap (user_id, skill, description, status, deadline) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        conn.commit()
+    return user_id
+
+def measure(label, fetch, user_id, by_attribute=False):
+    tracemalloc.start()
+    tasks = fetch(user_id)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    if by_attribute:
+        done = sum(1 for task in tasks if task.status == 1)
+        overdue = sum(1 for task in tasks if task.status == 0 and task.deadline < "2027-06-01")
+    else:
+        done = sum(1 for task in tasks if task['status'] == 1)
+        overdue = sum(1 for task in tasks if task['status'] == 0 and task['deadline'] < "2027-06-01")
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<22} {current / 2**20:9.1f} MiB {elapsed:8.3f} s   (done={done}, overdue={overdue})")
+    del tasks
+
+def main():
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_NAME = os.path.join(tmp, "bench.db")
+        user_id = build_database(num_tasks)
+        print(f"{num_tasks} tasks: retained memory / iteration time")
+        measure("sqlite3.Row", db.fetch_tasks, user_id)
+        measure("TaskRecord", db.fetch_task_records, user_id)
+        measure("TaskRecord (attrs)", db.fetch_task_records, user_id, by_attribute=True)
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,45 @@
 import sqlite3
-from datetime import datetime
+import sys
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 DATABASE_NAME = "data/roadmap_tracker.db"
 
+# Per-thread state of read pool workers (see start_read_pool)
+_read_local = threading.local()
+
 def connect_db():
     """Connects to the SQLite database."""
     conn = sqlite3.connect(DATABASE_NAME)
     conn.row_factory = sqlite3.Row # Allows accessing columns by name
+    conn.execute("PRAGMA synchronous = NORMAL") # Safe with WAL, avoids an fsync per commit
     return conn
 
+def _read_connection():
+    """
+    Connection for the read functions the dashboard submits to the read pool: the worker's
+    own long-lived connection there (callers must not close it), a fresh one elsewhere.
+    """
+    conn = getattr(_read_local, "conn", None)
+    return conn if conn is not None else connect_db()
+
+# SQL expressions shared by schema triggers and sync
+NEW_UID_SQL = "lower(hex(randomblob(16)))"
+NOW_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
 def setup_database():
     """Creates the necessary tables if they don't exist."""
     with connect_db() as conn:
         cursor = conn.cursor()
+
+        # Incremental auto-vacuum only takes effect on a new database (see run_maintenance for older ones)
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        # WAL lets the writer thread commit while the GUI thread keeps reading
+        cursor.execute("PRAGMA journal_mode = WAL")
         
         # 1. users table
         cursor.execute("""
@@ -20,9 +47,11 @@ def setup_database():
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL UNIQUE,
                 goal TEXT,
-                date_created TEXT
+                date_created TEXT,
+                target_date TEXT -- overall roadmap deadline (set on import)
             )
         """)
+        _ensure_column(cursor, "users", "target_date", "TEXT")
         
         # 2. roadmap table (tasks/skills)
         cursor.execute("""
@@ -33,11 +62,112 @@ def setup_database():
                 description TEXT,
                 status INTEGER DEFAULT 0, -- 0: Pending, 1: Done
                 deadline TEXT,
+                parent_id INTEGER REFERENCES roadmap(id), -- NULL for top-level tasks
+                subtree_total INTEGER DEFAULT 1, -- materialized: tasks in this subtree (incl. itself)
+                subtree_done INTEGER DEFAULT 0,  -- materialized: done tasks in this subtree
+                completed_at TEXT, -- when the task was last marked done (NULL while pending)
+                uid TEXT, -- device-independent identity used by sync
+                updated_at TEXT, -- UTC time of the last user-visible change (sync conflict resolution)
+                origin TEXT, -- device that made that change (NULL: this device)
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         """)
+
+        # Databases created before hierarchical roadmaps lack these columns
+        added = [
+            _ensure_column(cursor, "roadmap", "parent_id", "INTEGER REFERENCES roadmap(id)"),
+            _ensure_column(cursor, "roadmap", "subtree_total", "INTEGER DEFAULT 1"),
+            _ensure_column(cursor, "roadmap", "subtree_done", "INTEGER DEFAULT 0"),
+        ]
+        _ensure_column(cursor, "roadmap", "completed_at", "TEXT")
+        for column in ("uid", "updated_at", "origin"):
+            _ensure_column(cursor, "roadmap", column, "TEXT")
+        cursor.execute(f"UPDATE roadmap SET uid = {NEW_UID_SQL}, updated_at = {NOW_SQL} WHERE uid IS NULL")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_roadmap_uid ON roadmap(uid)")
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_roadmap_user ON roadmap(user_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_roadmap_parent ON roadmap(parent_id)")
+
+        # 3. archived tasks: completed leaves moved out of the hot table (ids, parents and uids are kept)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS roadmap_archive (
+                id INTEGER PRIMARY KEY, -- same id the task had in roadmap
+                user_id INTEGER NOT NULL,
+                skill TEXT NOT NULL,
+                description TEXT,
+                status INTEGER DEFAULT 1,
+                deadline TEXT,
+                parent_id INTEGER, -- live or archived parent
+                completed_at TEXT,
+                uid TEXT,
+                updated_at TEXT,
+                origin TEXT,
+                archived_at TEXT,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_roadmap_archive_user ON roadmap_archive(user_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_roadmap_archive_parent ON roadmap_archive(parent_id)")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_roadmap_archive_uid ON roadmap_archive(uid)")
+
+        # The rollup rebuild reads the archive too, so it can only run once that table exists
+        if any(added):
+            _rebuild_rollups(conn)
+
+        # Append-only change log, filled by triggers so every write path (and every process) is covered
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                task_id INTEGER NOT NULL,
+                op TEXT NOT NULL, -- 'insert', 'update', 'touch' (derived columns only) or 'delete'
+                task_uid TEXT,
+                origin TEXT,
+                changed_at TEXT
+            )
+        """)
+        for column in ("task_uid", "origin", "changed_at"):
+            _ensure_column(cursor, "change_log", column, "TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_user_seq ON change_log(user_id, seq)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_task_uid ON change_log(task_uid)")
+
+        # Triggers are recreated on every start so older databases pick up new definitions.
+        # Updates that only touch derived columns (rollups, stamps) are logged as 'touch':
+        # the change watcher still sees them, sync does not push them.
+        content_changed = " OR ".join(f"NEW.{c} IS NOT OLD.{c}" for c in SYNC_FIELDS + ("parent_id",))
+        for op, row, op_sql in (("INSERT", "NEW", "'insert'"),
+                                ("UPDATE", "NEW", f"CASE WHEN {content_changed} THEN 'update' ELSE 'touch' END"),
+                                ("DELETE", "OLD", "'delete'")):
+            cursor.execute(f"DROP TRIGGER IF EXISTS roadmap_log_{op.lower()}")
+            cursor.execute(f"""
+                CREATE TRIGGER roadmap_log_{op.lower()} AFTER {op} ON roadmap
+                BEGIN
+                    INSERT INTO change_log (user_id, task_id, op, task_uid, origin, changed_at)
+                    VALUES ({row}.user_id, {row}.id, {op_sql}, {row}.uid, {row}.origin, {NOW_SQL});
+                END
+            """)
+
+        # New rows get a uid; user-visible edits refresh updated_at and mark the row as local.
+        # Remote changes applied by sync set updated_at themselves, which skips the stamp.
+        cursor.execute("DROP TRIGGER IF EXISTS roadmap_stamp_insert")
+        cursor.execute(f"""
+            CREATE TRIGGER roadmap_stamp_insert AFTER INSERT ON roadmap
+            WHEN NEW.uid IS NULL
+            BEGIN
+                UPDATE roadmap SET uid = {NEW_UID_SQL}, updated_at = {NOW_SQL} WHERE id = NEW.id;
+            END
+        """)
+        cursor.execute("DROP TRIGGER IF EXISTS roadmap_stamp_update")
+        cursor.execute(f"""
+            CREATE TRIGGER roadmap_stamp_update
+            AFTER UPDATE OF skill, description, status, deadline, parent_id ON roadmap
+            WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN
+                UPDATE roadmap SET updated_at = {NOW_SQL}, origin = NULL WHERE id = NEW.id;
+            END
+        """)
         
-        # 3. progress/streak table
+        # 4. progress/streak table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS progress (
                 user_id INTEGER PRIMARY KEY,
@@ -46,8 +176,232 @@ def setup_database():
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
         """)
+
+        # 5. daily progress snapshots (one row per user per day, for burndown/velocity)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS progress_snapshots (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                done INTEGER NOT NULL,
+                PRIMARY KEY (user_id, day),
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            ) WITHOUT ROWID
+        """)
+
+        # 6. per-user aggregates for the cohort view, maintained by triggers
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_stats (
+                user_id INTEGER PRIMARY KEY,
+                total INTEGER DEFAULT 0,
+                done INTEGER DEFAULT 0,
+                progress REAL DEFAULT 0, -- percent
+                overdue INTEGER DEFAULT 0, -- pending tasks with deadline < overdue_as_of
+                overdue_as_of TEXT, -- day the overdue count was last rolled forward to
+                streak_days INTEGER DEFAULT 0,
+                last_login TEXT,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_stats_progress ON user_stats(progress)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_stats_overdue ON user_stats(overdue)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_roadmap_pending_deadline ON roadmap(user_id, status, deadline)")
+        _create_user_stats_triggers(cursor)
+        if cursor.execute("SELECT COUNT(*) FROM user_stats").fetchone()[0] < \
+                cursor.execute("SELECT COUNT(*) FROM users").fetchone()[0]:
+            _rebuild_user_stats(conn)
+
+        # 7. settings (device id, maintenance options) and the last exchanged sequence per sync server
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        cursor.execute(
+            f"INSERT OR IGNORE INTO settings (key, value) VALUES ('device_id', {NEW_UID_SQL})"
+        )
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                user_id INTEGER NOT NULL,
+                server_url TEXT NOT NULL,
+                last_pushed_seq INTEGER DEFAULT 0, -- local change_log sequence
+                last_pulled_seq INTEGER DEFAULT 0, -- server sequence
+                PRIMARY KEY (user_id, server_url)
+            )
+        """)
+
+        # 8. earned badges (each badge is awarded once per user)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS earned_badges (
+                user_id INTEGER NOT NULL,
+                badge_key TEXT NOT NULL,
+                title TEXT NOT NULL,
+                earned_at TEXT,
+                PRIMARY KEY (user_id, badge_key),
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """)
+
+        # 9. spaced-repetition state per completed task (live or archived), maintained by triggers
+        new_reviews = not cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reviews'"
+        ).fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                task_id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                ease REAL DEFAULT 2.5, -- SM-2 ease factor
+                interval_days INTEGER DEFAULT 0,
+                repetitions INTEGER DEFAULT 0, -- successful reviews in a row
+                due_date TEXT NOT NULL,
+                last_reviewed TEXT,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """)
+        # Today's queue is a range scan of this index (rowid = task_id keeps ties ordered)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_user_due ON reviews(user_id, due_date)")
+        _create_review_triggers(cursor)
+        if new_reviews:
+            # Tasks finished before reviews existed are spread over two weeks instead of all falling due at once
+            for table in ("roadmap", "roadmap_archive"):
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO reviews (task_id, user_id, due_date)
+                    SELECT id, user_id, date('now', 'localtime', '+' || (id % 14) || ' days')
+                    FROM {table} WHERE status = 1
+                """)
+
+        # Phases saved before their status followed their subtasks are brought in line (once:
+        # later phases may keep an explicitly set status, see _update_tasks_status)
+        if not cursor.execute("SELECT 1 FROM settings WHERE key = 'phase_status_derived'").fetchone():
+            _derive_parent_status(conn, [row[0] for row in cursor.execute("SELECT id FROM roadmap WHERE subtree_total > 1")])
+            cursor.execute("INSERT INTO settings (key, value) VALUES ('phase_status_derived', '1')")
         conn.commit()
 
+def _overdue_sql(row):
+    """1 when `row` (NEW/OLD) counts as overdue at the user's current overdue_as_of day."""
+    return (f"({row}.status = 0 AND {row}.deadline IS NOT NULL AND {row}.deadline < "
+            f"(SELECT overdue_as_of FROM user_stats WHERE user_id = {row}.user_id))")
+
+def _create_user_stats_triggers(cursor):
+    """Keeps user_stats in step with every roadmap/progress write, one row update per change."""
+    recompute = ("UPDATE user_stats SET progress = CASE WHEN total > 0 THEN done * 100.0 / total ELSE 0 END "
+                 "WHERE user_id = {row}.user_id;")
+    triggers = {
+        "user_stats_user_insert": f"""
+            AFTER INSERT ON users BEGIN
+                INSERT OR IGNORE INTO user_stats (user_id, overdue_as_of) VALUES (NEW.id, date('now', 'localtime'));
+            END""",
+        "user_stats_task_insert": f"""
+            AFTER INSERT ON roadmap BEGIN
+                UPDATE user_stats SET total = total + 1, done = done + (NEW.status = 1),
+                                      overdue = overdue + {_overdue_sql('NEW')}
+                WHERE user_id = NEW.user_id;
+                {recompute.format(row='NEW')}
+            END""",
+        "user_stats_task_update": f"""
+            AFTER UPDATE OF status, deadline ON roadmap
+            WHEN NEW.status IS NOT OLD.status OR NEW.deadline IS NOT OLD.deadline BEGIN
+                UPDATE user_stats SET done = done + (NEW.status = 1) - (OLD.status = 1),
+                                      overdue = overdue + {_overdue_sql('NEW')} - {_overdue_sql('OLD')}
+                WHERE user_id = NEW.user_id;
+                {recompute.format(row='NEW')}
+            END""",
+        "user_stats_task_delete": f"""
+            AFTER DELETE ON roadmap BEGIN
+                UPDATE user_stats SET total = total - 1, done = done - (OLD.status = 1),
+                                      overdue = overdue - {_overdue_sql('OLD')}
+                WHERE user_id = OLD.user_id;
+                {recompute.format(row='OLD')}
+            END""",
+        # Archiving inserts the archived copy before deleting the live row, so totals never dip
+        "user_stats_archive_insert": f"""
+            AFTER INSERT ON roadmap_archive BEGIN
+                UPDATE user_stats SET total = total + 1, done = done + (NEW.status = 1) WHERE user_id = NEW.user_id;
+                {recompute.format(row='NEW')}
+            END""",
+        "user_stats_archive_delete": f"""
+            AFTER DELETE ON roadmap_archive BEGIN
+                UPDATE user_stats SET total = total - 1, done = done - (OLD.status = 1) WHERE user_id = OLD.user_id;
+                {recompute.format(row='OLD')}
+            END""",
+        "user_stats_streak_insert": """
+            AFTER INSERT ON progress BEGIN
+                UPDATE user_stats SET streak_days = NEW.streak_days, last_login = NEW.last_login
+                WHERE user_id = NEW.user_id;
+            END""",
+        "user_stats_streak_update": """
+            AFTER UPDATE ON progress BEGIN
+                UPDATE user_stats SET streak_days = NEW.streak_days, last_login = NEW.last_login
+                WHERE user_id = NEW.user_id;
+            END""",
+    }
+    for name, body in triggers.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"CREATE TRIGGER {name} {body}")
+
+def _create_review_triggers(cursor):
+    """Schedules a first review when a task is completed and drops it when the task is reopened or deleted."""
+    first_review = "INSERT OR IGNORE INTO reviews (task_id, user_id, due_date) " \
+                   "VALUES (NEW.id, NEW.user_id, date('now', 'localtime', '+1 day'));"
+    triggers = {
+        "reviews_task_insert": f"""
+            AFTER INSERT ON roadmap WHEN NEW.status = 1 BEGIN
+                {first_review}
+            END""",
+        "reviews_task_done": f"""
+            AFTER UPDATE OF status ON roadmap WHEN NEW.status = 1 AND OLD.status IS NOT 1 BEGIN
+                {first_review}
+            END""",
+        "reviews_task_reopened": """
+            AFTER UPDATE OF status ON roadmap WHEN NEW.status IS NOT 1 AND OLD.status = 1 BEGIN
+                DELETE FROM reviews WHERE task_id = NEW.id;
+            END""",
+        # Archiving copies the task before deleting it, so archived tasks keep their schedule
+        "reviews_task_delete": """
+            AFTER DELETE ON roadmap WHEN NOT EXISTS (SELECT 1 FROM roadmap_archive WHERE id = OLD.id) BEGIN
+                DELETE FROM reviews WHERE task_id = OLD.id;
+            END""",
+        "reviews_archive_delete": """
+            AFTER DELETE ON roadmap_archive BEGIN
+                DELETE FROM reviews WHERE task_id = OLD.id;
+            END""",
+    }
+    for name, body in triggers.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"CREATE TRIGGER {name} {body}")
+
+def _rebuild_user_stats(conn):
+    """Recomputes every user's aggregates from scratch (first run / migrations only)."""
+    conn.execute("DELETE FROM user_stats")
+    conn.execute("""
+        INSERT INTO user_stats (user_id, total, done, progress, overdue, overdue_as_of, streak_days, last_login)
+        SELECT u.id,
+               COUNT(r.id),
+               COALESCE(SUM(r.status = 1), 0),
+               CASE WHEN COUNT(r.id) > 0 THEN COALESCE(SUM(r.status = 1), 0) * 100.0 / COUNT(r.id) ELSE 0 END,
+               COALESCE(SUM(r.status = 0 AND r.deadline IS NOT NULL AND r.deadline < date('now', 'localtime')), 0),
+               date('now', 'localtime'),
+               COALESCE(p.streak_days, 0),
+               p.last_login
+        FROM users u
+        LEFT JOIN (
+            SELECT id, user_id, status, deadline FROM roadmap
+            UNION ALL
+            SELECT id, user_id, status, NULL FROM roadmap_archive
+        ) r ON r.user_id = u.id
+        LEFT JOIN progress p ON p.user_id = u.id
+        GROUP BY u.id
+    """)
+
+def _ensure_column(cursor, table, column, definition):
+    """Adds `column` to `table` if missing. Returns True when the column was added."""
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if column in columns:
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
 # --- User Management Functions ---
 
 def create_user(name, goal):
@@ -72,69 +426,402 @@ def create_user(name, goal):
     except sqlite3.IntegrityError:
         return None # User name already exists
 
+def get_user_by_id(user_id):
+    """Fetches user data by id."""
+    with connect_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name, goal FROM users WHERE id = ?", (user_id,))
+        return cursor.fetchone()
+
 def get_user_by_name(name):
     """Fetches user data by name."""
-    with connect_db() as conn:
+    with _read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT id, name, goal FROM users WHERE name = ?", (name,))
         return cursor.fetchone()
 
 # --- Roadmap Task Management Functions ---
 
-def add_task(user_id, skill, description, deadline=None):
-    """Adds a new task to the roadmap."""
-    with connect_db() as conn:
+class TaskRecord:
+    """
+    Compact, read-only view of a roadmap row. Uses __slots__ instead of a per-row
+    dict and interns repeated strings (skill, description, deadline), so large
+    roadmaps share one copy of each value. Supports task['status'] like sqlite3.Row.
+    """
+    __slots__ = ("id", "user_id", "parent_id", "skill", "description", "status",
+                 "deadline", "subtree_total", "subtree_done", "depth")
+
+    # Column order expected by the constructor (depth is only selected by tree queries)
+    COLUMNS = __slots__[:-1]
+
+    def __init__(self, id, user_id, parent_id, skill, description, status,
+                 deadline, subtree_total, subtree_done, depth=0):
+        self.id = id
+        self.user_id = user_id
+        self.parent_id = parent_id
+        self.skill = sys.intern(skill)
+        self.description = sys.intern(description) if description else description
+        self.status = status
+        self.deadline = sys.intern(deadline) if deadline else deadline
+        self.subtree_total = subtree_total
+        self.subtree_done = subtree_done
+        self.depth = depth
+
+    # task['status'] is resolved exactly like task.status
+    __getitem__ = object.__getattribute__
+
+    def __repr__(self):
+        return f"TaskRecord(id={self.id}, skill={self.skill!r}, status={self.status})"
+
+def _task_record_factory(cursor, row):
+    return TaskRecord(*row)
+
+TASK_RECORD_SELECT = ", ".join(f"r.{column}" for column in TaskRecord.COLUMNS)
+
+def _add_task(conn, user_id, skill, description, deadline=None, parent_id=None):
+    cursor = conn.execute(
+        "INSERT INTO roadmap (user_id, skill, description, deadline, parent_id) VALUES (?, ?, ?, ?, ?)",
+        (user_id, skill, description, deadline, parent_id)
+    )
+    if parent_id is not None:
+        _adjust_ancestors(conn, [(parent_id, 1, 0)])
+    return cursor.lastrowid
+
+def _update_task_status(conn, task_id, status):
+    _update_tasks_status(conn, [task_id], status)
+
+def _delete_task(conn, task_id):
+    _delete_tasks(conn, [task_id])
+
+# SQLite caps the number of bound parameters, so IN (...) lists are chunked
+MAX_IDS_PER_STATEMENT = 500
+
+def _id_chunks(task_ids):
+    task_ids = list(task_ids)
+    for start in range(0, len(task_ids), MAX_IDS_PER_STATEMENT):
+        chunk = task_ids[start:start + MAX_IDS_PER_STATEMENT]
+        yield chunk, ",".join("?" * len(chunk))
+
+def _update_tasks_status(conn, task_ids, status, with_subtasks=True):
+    """
+    Sets the status of the given tasks and, unless `with_subtasks` is False, of everything below them.
+    Tasks set here keep that status even where their subtasks would derive another one
+    (e.g. a phase reopened after all of its subtasks were archived).
+    """
+    if with_subtasks:
+        task_ids = _subtree_ids(conn, task_ids)
+    _set_tasks_status(conn, task_ids, status, keep=set(task_ids))
+
+def _set_tasks_status(conn, task_ids, status, keep=()):
+    delta = 1 if status == 1 else -1
+    completed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S") if status == 1 else None
+    for chunk, marks in _id_chunks(task_ids):
+        # Only rows whose status actually flips move the rollups
+        changed = conn.execute(
+            f"SELECT id FROM roadmap WHERE id IN ({marks}) AND status != ?", (*chunk, status)
+        ).fetchall()
+        if not changed:
+            continue
         conn.execute(
-            "INSERT INTO roadmap (user_id, skill, description, deadline) VALUES (?, ?, ?, ?)",
-            (user_id, skill, description, deadline)
+            f"UPDATE roadmap SET status = ?, completed_at = ? WHERE id IN ({marks}) AND status != ?",
+            (status, completed_at, *chunk, status)
         )
+        _adjust_ancestors(conn, [(row[0], 0, delta) for row in changed], keep)
+
+def _subtree_ids(conn, task_ids):
+    """Returns the ids of the given live tasks and all of their live subtasks."""
+    subtree_ids = []
+    for chunk, marks in _id_chunks(task_ids):
+        subtree_ids += [row[0] for row in conn.execute(f"""
+            WITH RECURSIVE subtree(id) AS (
+                SELECT id FROM roadmap WHERE id IN ({marks})
+                UNION
+                SELECT r.id FROM roadmap r JOIN subtree s ON r.parent_id = s.id
+            )
+            SELECT id FROM subtree
+        """, chunk)]
+    return list(dict.fromkeys(subtree_ids))
+
+def _reschedule_tasks(conn, task_ids, deadline):
+    for chunk, marks in _id_chunks(task_ids):
+        conn.execute(f"UPDATE roadmap SET deadline = ? WHERE id IN ({marks})", (deadline, *chunk))
+
+def _delete_tasks(conn, task_ids):
+    """Deletes the given tasks together with their subtrees."""
+    for chunk, marks in _id_chunks(task_ids):
+        subtree = conn.execute(f"""
+            WITH RECURSIVE subtree(id) AS (
+                SELECT id FROM roadmap WHERE id IN ({marks})
+                UNION
+                SELECT r.id FROM roadmap r JOIN subtree s ON r.parent_id = s.id
+            )
+            SELECT r.id, r.parent_id, r.subtree_total, r.subtree_done
+            FROM roadmap r JOIN subtree s ON r.id = s.id
+        """, chunk).fetchall()
+        if not subtree:
+            continue
+
+        # Subtree roots (parent outside the deleted set) take their counts out of the ancestors
+        deleted_ids = {row['id'] for row in subtree}
+        _adjust_ancestors(conn, [
+            (row['parent_id'], -row['subtree_total'], -row['subtree_done'])
+            for row in subtree
+            if row['parent_id'] is not None and row['parent_id'] not in deleted_ids
+        ])
+        for id_chunk, id_marks in _id_chunks(deleted_ids):
+            # Archived subtasks go with their live ancestor
+            conn.execute(f"""
+                WITH RECURSIVE archived(id) AS (
+                    SELECT id FROM roadmap_archive WHERE parent_id IN ({id_marks})
+                    UNION
+                    SELECT a.id FROM roadmap_archive a JOIN archived s ON a.parent_id = s.id
+                )
+                DELETE FROM roadmap_archive WHERE id IN (SELECT id FROM archived)
+            """, id_chunk)
+            conn.execute(f"DELETE FROM roadmap WHERE id IN ({id_marks})", id_chunk)
+
+def add_task(user_id, skill, description, deadline=None, parent_id=None):
+    """Adds a new task to the roadmap (optionally under `parent_id`) and returns its id."""
+    with connect_db() as conn:
+        task_id = _add_task(conn, user_id, skill, description, deadline, parent_id)
         conn.commit()
+        return task_id
 
 def fetch_tasks(user_id):
     """Fetches all roadmap tasks for a user."""
+    flush_writes()
     with connect_db() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM roadmap WHERE user_id = ?", (user_id,))
         return cursor.fetchall()
 
+def fetch_task_records(user_id):
+    """Fetches all roadmap tasks for a user as compact TaskRecord objects."""
+    flush_writes()
+    with connect_db() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = _task_record_factory
+        cursor.execute(f"SELECT {TASK_RECORD_SELECT} FROM roadmap r WHERE r.user_id = ?", (user_id,))
+        return cursor.fetchall()
+
+def get_task_counts(user_id):
+    """Returns (done, total) for a user's roadmap from the trigger-maintained aggregates."""
+    flush_writes()
+    with _read_connection() as conn:
+        row = conn.execute("SELECT done, total FROM user_stats WHERE user_id = ?", (user_id,)).fetchone()
+        return (row[0], row[1]) if row else (0, 0)
+
 def update_task_status(task_id, status):
     """Marks a task as complete (1) or pending (0)."""
     with connect_db() as conn:
-        conn.execute(
-            "UPDATE roadmap SET status = ? WHERE id = ?",
-            (status, task_id)
-        )
+        _update_task_status(conn, task_id, status)
         conn.commit()
 
 def delete_task(task_id):
-    """Deletes a task from the roadmap."""
+    """Deletes a task (and any subtasks) from the roadmap."""
+    with connect_db() as conn:
+        _delete_task(conn, task_id)
+        conn.commit()
+
+# --- Hierarchical Roadmaps (parent_id + materialized subtree rollups) ---
+
+def _adjust_ancestors(conn, changes, keep=()):
+    """
+    Applies (task_id, d_total, d_done) to each task and all of its ancestors.
+    Only the path to the root is touched, never the whole tree. Tasks on the path
+    re-derive their status, except those in `keep`.
+    """
+    changes = [c for c in changes if c[1] or c[2]]
+    if not changes:
+        return
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_delta (id INTEGER, d_total INTEGER, d_done INTEGER)")
+    conn.execute("DELETE FROM rollup_delta")
+    conn.executemany("INSERT INTO rollup_delta VALUES (?, ?, ?)", changes)
+    totals = conn.execute("""
+        WITH RECURSIVE path(id, d_total, d_done) AS (
+            SELECT id, d_total, d_done FROM rollup_delta
+            UNION ALL
+            SELECT r.parent_id, p.d_total, p.d_done
+            FROM path p JOIN roadmap r ON r.id = p.id
+            WHERE r.parent_id IS NOT NULL
+        )
+        SELECT id, SUM(d_total), SUM(d_done) FROM path GROUP BY id
+    """).fetchall()
+    conn.executemany(
+        "UPDATE roadmap SET subtree_total = subtree_total + ?, subtree_done = subtree_done + ? WHERE id = ?",
+        [(d_total, d_done, task_id) for task_id, d_total, d_done in totals]
+    )
+    _derive_parent_status(conn, [task_id for task_id, _d_total, _d_done in totals if task_id not in keep])
+
+def _derive_parent_status(conn, task_ids):
+    """
+    Phases follow their subtasks: a task with subtasks is done exactly when all of
+    them are (archived ones count as done). Flips roll up like any other status change.
+    """
+    for status in (1, 0):
+        flipped = []
+        for chunk, marks in _id_chunks(task_ids):
+            flipped += [row[0] for row in conn.execute(f"""
+                SELECT id FROM roadmap
+                WHERE id IN ({marks}) AND subtree_total > 1
+                  AND (subtree_done - (status = 1) = subtree_total - 1) = ? AND status IS NOT ?
+            """, (*chunk, status == 1, status))]
+        if flipped:
+            _set_tasks_status(conn, flipped, status)
+
+def _rebuild_rollups(conn, user_id=None):
+    """
+    Recomputes every materialized rollup from scratch (migrations and bulk imports only).
+    Archived subtasks still count towards their live ancestors.
+    """
+    where, params = ("WHERE user_id = ?", (user_id,)) if user_id is not None else ("", ())
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_rebuild (id INTEGER PRIMARY KEY, total INTEGER, done INTEGER)")
+    conn.execute("DELETE FROM rollup_rebuild")
+    conn.execute(f"""
+        INSERT INTO rollup_rebuild (id, total, done)
+        WITH RECURSIVE tasks(id, parent_id, status) AS (
+            SELECT id, parent_id, status FROM roadmap {where}
+            UNION ALL
+            SELECT id, parent_id, status FROM roadmap_archive {where}
+        ),
+        closure(ancestor, node, status) AS (
+            SELECT id, id, status FROM tasks
+            UNION ALL
+            SELECT c.ancestor, t.id, t.status FROM closure c JOIN tasks t ON t.parent_id = c.node
+        )
+        SELECT c.ancestor, COUNT(*), SUM(c.status = 1)
+        FROM closure c
+        WHERE c.ancestor IN (SELECT id FROM roadmap {where})
+        GROUP BY c.ancestor
+    """, params * 3)
+    conn.execute("""
+        UPDATE roadmap
+        SET subtree_total = (SELECT total FROM rollup_rebuild WHERE rollup_rebuild.id = roadmap.id),
+            subtree_done = (SELECT done FROM rollup_rebuild WHERE rollup_rebuild.id = roadmap.id)
+        WHERE id IN (SELECT id FROM rollup_rebuild)
+    """)
+
+def add_task_tree(user_id, nodes):
+    """
+    Inserts a whole outline in one transaction. `nodes` is a pre-order list of
+    (depth, skill, description, deadline); subtree sizes are computed up front
+    so no ancestor is updated more than once. Returns the number of tasks added.
+    """
+    nodes = list(nodes)
+    sizes = [1] * len(nodes)
+    stack = []
+    for i, (depth, *_rest) in enumerate(nodes):
+        while stack and nodes[stack[-1]][0] >= depth:
+            stack.pop()
+        for ancestor in stack:
+            sizes[ancestor] += 1
+        stack.append(i)
+
+    with connect_db() as conn:
+        id_stack = [] # (depth, task_id) of the current ancestor chain
+        for (depth, skill, description, deadline), size in zip(nodes, sizes):
+            while id_stack and id_stack[-1][0] >= depth:
+                id_stack.pop()
+            parent_id = id_stack[-1][1] if id_stack else None
+            cursor = conn.execute(
+                "INSERT INTO roadmap (user_id, skill, description, deadline, parent_id, subtree_total) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, skill, description, deadline, parent_id, size)
+            )
+            id_stack.append((depth, cursor.lastrowid))
+        conn.commit()
+    return len(nodes)
+
+def fetch_task_tree(user_id):
+    """Fetches the user's tasks as TaskRecords in depth-first order, each with its `depth`."""
+    flush_writes()
+    with _read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = _task_record_factory
+        cursor.execute(f"""
+            WITH RECURSIVE tree(id, depth, path) AS (
+                SELECT id, 0, printf('%010d', id) FROM roadmap
+                WHERE user_id = ? AND parent_id IS NULL
+                UNION ALL
+                SELECT r.id, t.depth + 1, t.path || '/' || printf('%010d', r.id)
+                FROM tree t JOIN roadmap r ON r.parent_id = t.id
+            )
+            SELECT {TASK_RECORD_SELECT}, t.depth FROM tree t JOIN roadmap r ON r.id = t.id
+            ORDER BY t.path
+        """, (user_id,))
+        return cursor.fetchall()
+
+def get_subtree_progress(task_id):
+    """Returns (done, total) for a task's subtree from the materialized rollup (O(1))."""
+    flush_writes()
+    with connect_db() as conn:
+        row = conn.execute(
+            "SELECT subtree_done, subtree_total FROM roadmap WHERE id = ?", (task_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, 0)
+
+def compute_subtree_progress(task_id):
+    """Returns (done, total) for a task's subtree (archived subtasks included) by walking it with a recursive CTE."""
+    flush_writes()
+    with connect_db() as conn:
+        row = conn.execute("""
+            WITH RECURSIVE tasks(id, parent_id, status) AS (
+                SELECT id, parent_id, status FROM roadmap
+                UNION ALL
+                SELECT id, parent_id, status FROM roadmap_archive
+            ),
+            subtree(id, status) AS (
+                SELECT id, status FROM roadmap WHERE id = ?
+                UNION ALL
+                SELECT t.id, t.status FROM tasks t JOIN subtree s ON t.parent_id = s.id
+            )
+            SELECT COALESCE(SUM(status = 1), 0), COUNT(*) FROM subtree
+        """, (task_id,)).fetchone()
+        return row[0], row[1]
+
+def rebuild_rollups(user_id=None):
+    """Recomputes materialized subtree counts for one user (or everyone)."""
+    with connect_db() as conn:
+        _rebuild_rollups(conn, user_id)
+        conn.commit()
+
+# --- Bulk Task Operations (one transaction each) ---
+
+def update_tasks_status(task_ids, status):
+    """Marks every task in `task_ids` as complete (1) or pending (0)."""
+    with connect_db() as conn:
+        _update_tasks_status(conn, task_ids, status)
+        conn.commit()
+
+def reschedule_tasks(task_ids, deadline):
+    """Sets the same deadline (YYYY-MM-DD or None) on every task in `task_ids`."""
+    with connect_db() as conn:
+        _reschedule_tasks(conn, task_ids, deadline)
+        conn.commit()
+
+def delete_tasks(task_ids):
+    """Deletes every task in `task_ids`, including their subtasks."""
     with connect_db() as conn:
-        conn.execute("DELETE FROM roadmap WHERE id = ?", (task_id,))
+        _delete_tasks(conn, task_ids)
         conn.commit()
 
 # --- Progress and Streak Management Functions ---
 
 def get_progress_data(user_id):
     """Fetches streak and last login data."""
-    with connect_db() as conn:
+    with _read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM progress WHERE user_id = ?", (user_id,))
         return cursor.fetchone()
 
-def update_streak(user_id):
-    """Checks and updates the user's login streak."""
+def calculate_streak(user_id):
+    """Returns (streak, today) for a login today without storing anything."""
     today = datetime.now().strftime("%Y-%m-%d")
     progress_data = get_progress_data(user_id)
     
     if not progress_data:
-        # User somehow doesn't have a progress record, initialize one
-        with connect_db() as conn:
-            conn.execute(
-                "INSERT INTO progress (user_id, last_login) VALUES (?, ?)",
-                (user_id, today)
-            )
-            conn.commit()
-            return 1
+        # User somehow doesn't have a progress record, one is initialized on save
+        return 1, today
 
     last_login_str = progress_data['last_login']
     current_streak = progress_data['streak_days']
@@ -160,12 +847,745 @@ def update_streak(user_id):
     else:
         # Covers first-time login or unusual cases
         new_streak = 1
-        
-    # Update DB with new streak and today's login
+    return new_streak, today
+
+def _save_streak(conn, user_id, streak_days, last_login):
+    conn.execute("""
+        INSERT INTO progress (user_id, streak_days, last_login) VALUES (?, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET streak_days = excluded.streak_days, last_login = excluded.last_login
+    """, (user_id, streak_days, last_login))
+
+# --- Burndown / Velocity Analytics ---
+
+def set_target_date(user_id, target_date):
+    """Stores the user's overall roadmap deadline (YYYY-MM-DD)."""
+    with connect_db() as conn:
+        conn.execute("UPDATE users SET target_date = ? WHERE id = ?", (target_date, user_id))
+        conn.commit()
+
+def get_target_date(user_id):
+    with connect_db() as conn:
+        row = conn.execute("SELECT target_date FROM users WHERE id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+def _record_daily_snapshot(conn, user_id):
+    """Upserts today's (total, done) snapshot; cheap enough to call on every refresh."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    conn.execute("""
+        INSERT INTO progress_snapshots (user_id, day, total, done)
+        SELECT ?, ?, total, done FROM user_stats WHERE user_id = ?
+        ON CONFLICT (user_id, day) DO UPDATE SET total = excluded.total, done = excluded.done
+    """, (user_id, today, user_id))
+
+def snapshot_is_current(user_id):
+    """True when today's snapshot already matches the user's current (total, done)."""
+    flush_writes()
+    today = datetime.now().strftime("%Y-%m-%d")
+    with _read_connection() as conn:
+        return conn.execute("""
+            SELECT 1 FROM progress_snapshots p JOIN user_stats s ON s.user_id = p.user_id
+            WHERE p.user_id = ? AND p.day = ? AND p.total = s.total AND p.done = s.done
+        """, (user_id, today)).fetchone() is not None
+
+def fetch_burndown(user_id, velocity_window=7):
+    """
+    Returns one row per snapshot day: day, total, remaining and the rolling velocity
+    (tasks completed per calendar day over the last `velocity_window` snapshots),
+    computed with window functions in a single pass.
+    """
+    with connect_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT day, total, total - done AS remaining,
+                   (done - COALESCE(LAG(done, ?) OVER w, FIRST_VALUE(done) OVER w)) * 1.0
+                   / NULLIF(julianday(day) - julianday(COALESCE(LAG(day, ?) OVER w, FIRST_VALUE(day) OVER w)), 0)
+                   AS velocity
+            FROM progress_snapshots
+            WHERE user_id = ?
+            WINDOW w AS (ORDER BY day)
+            ORDER BY day
+        """, (velocity_window, velocity_window, user_id))
+        return cursor.fetchall()
+
+# --- Cross-Process Change Detection ---
+
+def _latest_change_seq(conn):
+    # sqlite_sequence keeps the high-water mark even after old log rows are pruned
+    return conn.execute(
+        "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'change_log'), 0)"
+    ).fetchone()[0]
+
+class ChangeWatcher:
+    """
+    Detects commits made by other connections (other app instances, the writer thread).
+    poll() costs one PRAGMA data_version when nothing changed; otherwise it reads only
+    the tasks touched since the last seen change_log sequence.
+    """
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.conn = connect_db()
+        self.data_version = None
+        self.reset()
+
+    def reset(self):
+        """Marks everything committed so far as seen (call before a full reload)."""
+        self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self.last_seq = _latest_change_seq(self.conn)
+
+    def poll(self):
+        """Returns (changed TaskRecords, deleted task ids), or None when nothing changed."""
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return None
+        self.data_version = data_version
+
+        latest = _latest_change_seq(self.conn)
+        task_ids = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT task_id FROM change_log WHERE user_id = ? AND seq > ? AND seq <= ?",
+            (self.user_id, self.last_seq, latest)
+        )]
+        self.last_seq = latest
+        if not task_ids:
+            return None
+
+        changed = []
+        cursor = self.conn.cursor()
+        cursor.row_factory = _task_record_factory
+        for chunk, marks in _id_chunks(task_ids):
+            cursor.execute(f"SELECT {TASK_RECORD_SELECT} FROM roadmap r WHERE r.id IN ({marks}) ORDER BY r.id", chunk)
+            changed.extend(cursor.fetchall())
+        present = {task.id for task in changed}
+        deleted = [task_id for task_id in task_ids if task_id not in present]
+        return changed, deleted
+
+    def close(self):
+        self.conn.close()
+
+# --- Delta Sync (change log -> server, server -> local) ---
+
+# Marks rows deleted because a remote device deleted them, so the tombstone is not pushed back
+REMOTE_DELETE_ORIGIN = "__remote_delete__"
+
+SYNC_FIELDS = ("skill", "description", "status", "deadline", "completed_at")
+
+def get_device_id():
+    with connect_db() as conn:
+        return conn.execute("SELECT value FROM settings WHERE key = 'device_id'").fetchone()[0]
+
+def get_sync_state(user_id, server_url):
+    """Returns (last_pushed_seq, last_pulled_seq), or None if this user never synced with the server."""
+    with connect_db() as conn:
+        row = conn.execute(
+            "SELECT last_pushed_seq, last_pulled_seq FROM sync_state WHERE user_id = ? AND server_url = ?",
+            (user_id, server_url)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+def save_sync_state(user_id, server_url, last_pushed_seq, last_pulled_seq):
+    with connect_db() as conn:
+        conn.execute("""
+            INSERT INTO sync_state (user_id, server_url, last_pushed_seq, last_pulled_seq) VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id, server_url) DO UPDATE
+            SET last_pushed_seq = excluded.last_pushed_seq, last_pulled_seq = excluded.last_pulled_seq
+        """, (user_id, server_url, last_pushed_seq, last_pulled_seq))
+        conn.commit()
+
+def _sync_payload(row):
+    change = {field: row[field] for field in SYNC_FIELDS}
+    change.update(uid=row['uid'], parent_uid=row['parent_uid'], updated_at=row['updated_at'], deleted=False)
+    return change
+
+def fetch_local_changes(user_id, since_seq=None):
+    """
+    Returns (changes, latest_seq): the current state of every task this device changed
+    after `since_seq` (all local tasks when None), plus tombstones for local deletions.
+    Changes that arrived from other devices are not echoed back.
+    """
+    flush_writes()
+    with connect_db() as conn:
+        latest_seq = _latest_change_seq(conn)
+        columns = ", ".join(("id", "uid", "updated_at", "origin") + SYNC_FIELDS)
+        select = f"""
+            SELECT {columns}, parent_uid FROM (
+                SELECT r.*, p.uid AS parent_uid FROM roadmap r
+                LEFT JOIN roadmap p ON p.id = r.parent_id
+            )
+        """
+        archived_select = f"""
+            SELECT {columns}, parent_uid FROM (
+                SELECT a.*, COALESCE(p.uid, pa.uid) AS parent_uid FROM roadmap_archive a
+                LEFT JOIN roadmap p ON p.id = a.parent_id
+                LEFT JOIN roadmap_archive pa ON pa.id = a.parent_id
+            )
+        """
+        if since_seq is None:
+            # Archived tasks are sent too, so a new device starts with the full history
+            rows = conn.execute(f"""
+                {select} WHERE user_id = ? AND origin IS NULL
+                UNION ALL
+                {archived_select} WHERE user_id = ? AND origin IS NULL
+                ORDER BY id
+            """, (user_id, user_id))
+            return [_sync_payload(row) for row in rows], latest_seq
+
+        task_ids = [row[0] for row in conn.execute(
+            "SELECT DISTINCT task_id FROM change_log WHERE user_id = ? AND seq > ? AND seq <= ? AND op != 'touch'",
+            (user_id, since_seq, latest_seq)
+        )]
+        changes = []
+        present = set()
+        for chunk, marks in _id_chunks(task_ids):
+            for row in conn.execute(f"{select} WHERE id IN ({marks}) ORDER BY id", chunk):
+                present.add(row['id'])
+                if row['origin'] is None:
+                    changes.append(_sync_payload(row))
+
+        for task_id in task_ids:
+            if task_id in present:
+                continue
+            tombstone = conn.execute(
+                "SELECT task_uid, origin, changed_at FROM change_log "
+                "WHERE task_id = ? AND op = 'delete' ORDER BY seq DESC LIMIT 1",
+                (task_id,)
+            ).fetchone()
+            if not tombstone or not tombstone['task_uid'] or tombstone['origin'] == REMOTE_DELETE_ORIGIN:
+                continue
+            # Archiving deletes the live row too, but the task still exists: send its archived state
+            archived = conn.execute(f"{archived_select} WHERE uid = ?", (tombstone['task_uid'],)).fetchone()
+            if archived is None:
+                changes.append({"uid": tombstone['task_uid'], "updated_at": tombstone['changed_at'], "deleted": True})
+            elif archived['origin'] is None:
+                changes.append(_sync_payload(archived))
+        return changes, latest_seq
+
+def _local_version(conn, uid, device_id):
+    row = conn.execute("SELECT id, updated_at, origin FROM roadmap WHERE uid = ?", (uid,)).fetchone()
+    if row:
+        return row['id'], (row['updated_at'] or "", row['origin'] or device_id)
+    tombstone = conn.execute(
+        "SELECT changed_at FROM change_log WHERE task_uid = ? AND op = 'delete' ORDER BY seq DESC LIMIT 1",
+        (uid,)
+    ).fetchone()
+    if tombstone:
+        return None, (tombstone['changed_at'], device_id)
+    return None, None
+
+def _parents_first(changes):
+    """Orders pulled changes so a parent is applied before any child that arrives with it."""
+    by_uid = {change['uid']: change for change in changes}
+
+    def depth(change):
+        seen = {change['uid']}
+        parent = by_uid.get(change.get('parent_uid'))
+        while parent is not None and parent['uid'] not in seen:
+            seen.add(parent['uid'])
+            parent = by_uid.get(parent.get('parent_uid'))
+        return len(seen)
+
+    return sorted(changes, key=depth) # stable: server order is kept within a level
+
+def _move_task(conn, task_id, parent_id):
+    """Re-attaches a task (with its subtree) under `parent_id`, moving its counts between both ancestor paths."""
+    row = conn.execute(
+        "SELECT parent_id, subtree_total, subtree_done FROM roadmap WHERE id = ?", (task_id,)
+    ).fetchone()
+    if row['parent_id'] == parent_id:
+        return
+    if parent_id is not None and conn.execute("""
+        WITH RECURSIVE ancestors(id) AS (
+            SELECT ?
+            UNION
+            SELECT r.parent_id FROM roadmap r JOIN ancestors a ON r.id = a.id WHERE r.parent_id IS NOT NULL
+        )
+        SELECT 1 FROM ancestors WHERE id = ?
+    """, (parent_id, task_id)).fetchone():
+        return # The new parent lies inside the task's own subtree
+    if row['parent_id'] is not None:
+        _adjust_ancestors(conn, [(row['parent_id'], -row['subtree_total'], -row['subtree_done'])])
+    conn.execute("UPDATE roadmap SET parent_id = ? WHERE id = ?", (parent_id, task_id))
+    if parent_id is not None:
+        _adjust_ancestors(conn, [(parent_id, row['subtree_total'], row['subtree_done'])])
+
+def apply_remote_changes(user_id, changes):
+    """
+    Applies changes pulled from the sync server in one transaction.
+    Conflicts are resolved deterministically: the higher (updated_at, device_id) wins.
+    Parents are applied before their children, and existing tasks follow parent_uid.
+    Rollups are maintained through the regular incremental helpers. Tasks archived on
+    this device are left as they are. Returns the number applied.
+    """
+    device_id = get_device_id()
+    applied = 0
+    with connect_db() as conn:
+        for change in _parents_first(changes):
+            if conn.execute("SELECT 1 FROM roadmap_archive WHERE uid = ?", (change['uid'],)).fetchone():
+                continue
+            task_id, local_version = _local_version(conn, change['uid'], device_id)
+            if local_version is not None and (change['updated_at'], change['device_id']) <= local_version:
+                continue # Local copy is newer (or identical)
+
+            if change.get('deleted'):
+                if task_id is not None:
+                    # Subtasks go with it, so their tombstones are marked remote too
+                    for chunk, marks in _id_chunks(_subtree_ids(conn, [task_id])):
+                        conn.execute(f"UPDATE roadmap SET origin = ? WHERE id IN ({marks})",
+                                     (REMOTE_DELETE_ORIGIN, *chunk))
+                    _delete_tasks(conn, [task_id])
+                    applied += 1
+                continue
+
+            parent = conn.execute(
+                "SELECT id FROM roadmap WHERE uid = ? AND user_id = ?", (change.get('parent_uid'), user_id)
+            ).fetchone()
+            parent_id = parent[0] if parent else None
+            if task_id is None:
+                task_id = _add_task(conn, user_id, change['skill'], change['description'],
+                                    change['deadline'], parent_id)
+            else:
+                conn.execute(
+                    "UPDATE roadmap SET skill = ?, description = ?, deadline = ? WHERE id = ?",
+                    (change['skill'], change['description'], change['deadline'], task_id)
+                )
+                # A parent archived on this device keeps the task where it is
+                if parent_id is not None or change.get('parent_uid') is None:
+                    _move_task(conn, task_id, parent_id)
+            _update_tasks_status(conn, [task_id], change['status'], with_subtasks=False)
+
+            # Setting updated_at explicitly keeps the stamp trigger from claiming the row as local
+            conn.execute(
+                "UPDATE roadmap SET uid = ?, completed_at = ?, updated_at = ?, origin = ? WHERE id = ?",
+                (change['uid'], change['completed_at'], change['updated_at'], change['device_id'], task_id)
+            )
+            applied += 1
+        conn.commit()
+    return applied
+
+# --- Cohort Leaderboard (reads user_stats only) ---
+
+# A streak only counts while the student logged in today or yesterday
+ACTIVE_STREAK_SQL = "CASE WHEN s.last_login >= date('now', 'localtime', '-1 day') THEN s.streak_days ELSE 0 END"
+
+# Sort keys offered by the cohort view -> SQL expression (whitelisted, never user text)
+LEADERBOARD_SORTS = {
+    "progress": "s.progress",
+    "streak": ACTIVE_STREAK_SQL,
+    "overdue": "s.overdue",
+    "name": "u.name",
+}
+
+def _refresh_overdue_counts(conn, today=None):
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    conn.execute("""
+        UPDATE user_stats
+        SET overdue = overdue + (
+                SELECT COUNT(*) FROM roadmap r
+                WHERE r.user_id = user_stats.user_id AND r.status = 0
+                  AND r.deadline >= user_stats.overdue_as_of AND r.deadline < ?
+            ),
+            overdue_as_of = ?
+        WHERE overdue_as_of < ?
+    """, (today, today, today))
+
+def refresh_overdue_counts(today=None):
+    """
+    Rolls every user's overdue count forward to `today`. Only pending tasks whose
+    deadline fell in the days since the last roll-forward are counted (an index range scan).
+    """
+    with connect_db() as conn:
+        _refresh_overdue_counts(conn, today)
+        conn.commit()
+
+def count_cohort_users():
+    with _read_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM user_stats").fetchone()[0]
+
+def fetch_leaderboard(sort_by="progress", descending=True, limit=50, offset=0):
+    """
+    Returns one page of the cohort ranking: rank, name, goal, progress, done, total,
+    streak (0 once a day has been missed) and overdue count. Read-only: overdue counts
+    are as of their last roll-forward (queue 'refresh_overdue_counts' first).
+    """
+    if sort_by not in LEADERBOARD_SORTS:
+        raise ValueError(f"Unknown leaderboard sort: {sort_by}")
+    flush_writes()
+    order = f"{LEADERBOARD_SORTS[sort_by]} {'DESC' if descending else 'ASC'}, u.name ASC"
+    with _read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT ROW_NUMBER() OVER (ORDER BY {order}) AS rank,
+                   u.id AS user_id, u.name, u.goal, s.progress, s.done, s.total, s.overdue,
+                   {ACTIVE_STREAK_SQL} AS active_streak
+            FROM user_stats s JOIN users u ON u.id = s.user_id
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        """, (limit, offset))
+        return cursor.fetchall()
+
+# --- Badges ---
+
+def _award_badges(conn, user_id, badges):
+    """
+    Records (badge_key, title) pairs for a user. Badges already earned are ignored.
+    Returns the titles that were newly awarded.
+    """
+    earned_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    awarded = []
+    for badge_key, title in badges:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO earned_badges (user_id, badge_key, title, earned_at) VALUES (?, ?, ?, ?)",
+            (user_id, badge_key, title, earned_at)
+        )
+        if cursor.rowcount:
+            awarded.append(title)
+    return awarded
+
+def fetch_earned_badges(user_id):
+    """Fetches every badge the user has earned, oldest first."""
+    with _read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT badge_key, title, earned_at FROM earned_badges WHERE user_id = ? ORDER BY earned_at, badge_key",
+            (user_id,)
+        )
+        return cursor.fetchall()
+
+# --- Spaced-Repetition Reviews ---
+
+def _record_review(conn, task_id, ease, interval_days, repetitions):
+    conn.execute("""
+        UPDATE reviews
+        SET ease = ?, interval_days = ?, repetitions = ?,
+            due_date = date('now', 'localtime', '+' || ? || ' days'), last_reviewed = ?
+        WHERE task_id = ?
+    """, (ease, interval_days, repetitions, interval_days, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), task_id))
+
+def record_review(task_id, ease, interval_days, repetitions):
+    """Stores the outcome of a review; the task is due again in `interval_days` days."""
+    with connect_db() as conn:
+        _record_review(conn, task_id, ease, interval_days, repetitions)
+        conn.commit()
+
+def count_due_reviews(user_id, day=None):
+    """Number of reviews due on or before `day` (default: today), counted from the due-date index."""
+    flush_writes()
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    with _read_connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM reviews WHERE user_id = ? AND due_date <= ?", (user_id, day)
+        ).fetchone()[0]
+
+def fetch_due_reviews(user_id, day=None, limit=50):
+    """
+    Returns up to `limit` reviews due on or before `day` (default: today), most overdue first,
+    with the skill and description of the live or archived task.
+    """
+    flush_writes()
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    with _read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT v.task_id, v.ease, v.interval_days, v.repetitions, v.due_date, v.last_reviewed,
+                   COALESCE(r.skill, a.skill) AS skill, COALESCE(r.description, a.description) AS description
+            FROM (
+                SELECT * FROM reviews WHERE user_id = ? AND due_date <= ?
+                ORDER BY due_date, task_id LIMIT ?
+            ) v
+            LEFT JOIN roadmap r ON r.id = v.task_id
+            LEFT JOIN roadmap_archive a ON a.id = v.task_id
+            ORDER BY v.due_date, v.task_id
+        """, (user_id, day, limit))
+        return cursor.fetchall()
+
+# --- Archiving and Idle Maintenance ---
+
+ARCHIVE_AFTER_DAYS = 30 # default age (since completion) before a done task is archived
+CHANGE_LOG_RETENTION_DAYS = 30
+ANALYZE_INTERVAL_DAYS = 7
+MAINTENANCE_VACUUM_PAGES = 1000 # free pages released per maintenance run
+
+def get_setting(key, default=None):
+    with connect_db() as conn:
+        row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+def set_setting(key, value):
     with connect_db() as conn:
         conn.execute(
-            "UPDATE progress SET streak_days = ?, last_login = ? WHERE user_id = ?",
-            (new_streak, today, user_id)
+            "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
         )
         conn.commit()
-        return new_streak
\ No newline at end of file
+
+def archive_completed_tasks(older_than_days=None, user_id=None):
+    """
+    Moves done tasks without live subtasks into roadmap_archive once they were completed
+    more than `older_than_days` ago (default: the 'archive_after_days' setting).
+    Ancestors keep counting archived subtasks and user_stats counts both tables,
+    so progress totals do not change. Returns the number of tasks archived.
+    """
+    if older_than_days is None:
+        older_than_days = int(get_setting("archive_after_days", ARCHIVE_AFTER_DAYS))
+    cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S")
+    user_filter, params = ("AND r.user_id = ?", (cutoff, user_id)) if user_id is not None else ("", (cutoff,))
+    with connect_db() as conn:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM archive_batch")
+        # Tasks done before completion times were recorded fall back to their last edit
+        archived = conn.execute(f"""
+            INSERT INTO archive_batch (id)
+            SELECT r.id FROM roadmap r
+            WHERE r.status = 1 AND COALESCE(r.completed_at, r.updated_at, '') < ? {user_filter}
+              AND NOT EXISTS (SELECT 1 FROM roadmap c WHERE c.parent_id = r.id)
+        """, params).rowcount
+        if archived:
+            conn.execute(f"""
+                INSERT INTO roadmap_archive (id, user_id, skill, description, status, deadline, parent_id,
+                                             completed_at, uid, updated_at, origin, archived_at)
+                SELECT id, user_id, skill, description, status, deadline, parent_id,
+                       completed_at, uid, updated_at, origin, {NOW_SQL}
+                FROM roadmap WHERE id IN (SELECT id FROM archive_batch)
+            """)
+            conn.execute("DELETE FROM roadmap WHERE id IN (SELECT id FROM archive_batch)")
+        conn.commit()
+    return archived
+
+def prune_change_log(retention_days=CHANGE_LOG_RETENTION_DAYS):
+    """
+    Deletes change-log rows older than `retention_days` that every sync server has
+    already received. Deletion tombstones are kept (sync resolves conflicts with them)
+    unless the task only left the roadmap by being archived. Returns the number pruned.
+    """
+    with connect_db() as conn:
+        pruned = conn.execute(f"""
+            DELETE FROM change_log
+            WHERE COALESCE(changed_at, '') < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)
+              AND seq <= COALESCE((SELECT MIN(last_pushed_seq) FROM sync_state), seq)
+              AND (op != 'delete' OR task_uid IN (SELECT uid FROM roadmap_archive))
+        """, (f"-{int(retention_days)} days",)).rowcount
+        conn.commit()
+    return pruned
+
+def run_maintenance(archive_after_days=None, vacuum_pages=MAINTENANCE_VACUUM_PAGES, convert_auto_vacuum=False):
+    """
+    Idle-time housekeeping: archives old completed tasks, prunes the change log,
+    releases up to `vacuum_pages` free pages and refreshes planner statistics
+    (a full ANALYZE every ANALYZE_INTERVAL_DAYS, PRAGMA optimize otherwise).
+    Databases created without incremental auto-vacuum only release pages after an
+    explicit `convert_auto_vacuum=True` run, which rewrites the whole file once.
+    Returns a summary dict.
+    """
+    flush_writes()
+    summary = {
+        "archived": archive_completed_tasks(archive_after_days),
+        "pruned": prune_change_log(),
+    }
+    with connect_db() as conn:
+        incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        if not incremental and convert_auto_vacuum:
+            # Switching an existing database over takes one full VACUUM (never done implicitly)
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            incremental = True
+        summary["vacuumed_pages"] = 0
+        if incremental:
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+            summary["vacuumed_pages"] = min(free_pages, vacuum_pages)
+
+        last_analyze = get_setting("last_analyze")
+        due = datetime.now() - timedelta(days=ANALYZE_INTERVAL_DAYS)
+        summary["analyzed"] = last_analyze is None or last_analyze < due.strftime("%Y-%m-%d %H:%M:%S")
+        if summary["analyzed"]:
+            conn.execute("ANALYZE")
+            conn.commit()
+            set_setting("last_analyze", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        else:
+            conn.execute("PRAGMA optimize")
+    return summary
+
+# --- Write-Behind Queue ---
+
+# Mutations that may be queued, keyed by the name passed to submit_write()
+WRITE_OPERATIONS = {
+    "add_task": _add_task,
+    "update_task_status": _update_task_status,
+    "delete_task": _delete_task,
+    "update_tasks_status": _update_tasks_status,
+    "reschedule_tasks": _reschedule_tasks,
+    "delete_tasks": _delete_tasks,
+    "record_review": _record_review,
+    "refresh_overdue_counts": _refresh_overdue_counts,
+    # Dashboard bookkeeping, queued by loads running on the read pool
+    "save_streak": _save_streak,
+    "record_daily_snapshot": _record_daily_snapshot,
+    "award_badges": _award_badges,
+}
+
+_STOP = object()
+
+class WriteBehindQueue:
+    """
+    Applies queued mutations on a single writer thread.
+    Writes arriving within `batch_window` seconds share one transaction (and one fsync).
+    `on_commit(batch, errors)` is called from the writer thread after every batch.
+    """
+    def __init__(self, on_commit=None, batch_window=0.05, max_batch=500):
+        self.on_commit = on_commit
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="DatabaseWriterThread", daemon=True)
+        self._thread.start()
+
+    def submit(self, op, *args):
+        """Queues a mutation; returns immediately."""
+        if op not in WRITE_OPERATIONS:
+            raise ValueError(f"Unknown write operation: {op}")
+        with self._idle:
+            self._pending += 1
+        self._queue.put((op, args))
+
+    def flush(self, timeout=None):
+        """Blocks until every queued mutation is committed. Returns False on timeout."""
+        if threading.current_thread() is self._thread:
+            return True
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        """Commits pending work and stops the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _apply(self, conn, batch):
+        errors = []
+        try:
+            with conn:
+                for op, args in batch:
+                    WRITE_OPERATIONS[op](conn, *args)
+        except Exception:
+            # One bad mutation must not discard the rest: retry them one by one
+            for op, args in batch:
+                try:
+                    with conn:
+                        WRITE_OPERATIONS[op](conn, *args)
+                except Exception as e:
+                    errors.append((op, args, e))
+        return errors
+
+    def _run(self):
+        conn = connect_db()
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+            try:
+                errors = self._apply(conn, batch)
+            except Exception as e:
+                errors = [(op, args, e) for op, args in batch]
+            finally:
+                # flush() waiters are released even if the batch could not be applied
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._idle.notify_all()
+            if self.on_commit:
+                try:
+                    self.on_commit(batch, errors)
+                except Exception as e:
+                    # A failing callback must not stop the writer thread
+                    print(f"Write commit callback failed: {e}")
+        conn.close()
+
+_writer = None
+
+def start_writer(on_commit=None):
+    """Starts the shared writer thread used by submit_write()."""
+    global _writer
+    if _writer is None:
+        _writer = WriteBehindQueue(on_commit)
+    return _writer
+
+def stop_writer():
+    """Flushes pending writes and stops the writer thread (call on shutdown)."""
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+def submit_write(op, *args):
+    """Queues a mutation on the writer thread, or applies it immediately if none is running."""
+    if _writer is None:
+        with connect_db() as conn:
+            WRITE_OPERATIONS[op](conn, *args)
+            conn.commit()
+    else:
+        _writer.submit(op, *args)
+
+def flush_writes(timeout=None):
+    """Waits for queued mutations so that subsequent reads see them."""
+    if _writer is not None:
+        return _writer.flush(timeout)
+    return True
+
+# --- Async Read Pool ---
+
+READ_POOL_WORKERS = 2
+
+_read_pool = None
+
+def _open_read_connection():
+    _read_local.conn = connect_db()
+
+def start_read_pool(workers=READ_POOL_WORKERS):
+    """
+    Starts a small thread pool for reads. Each worker opens one connection, which the
+    read functions built on _read_connection() reuse; connect_db() always opens a new one.
+    """
+    global _read_pool
+    if _read_pool is None:
+        _read_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="DatabaseReader",
+                                        initializer=_open_read_connection)
+    return _read_pool
+
+def stop_read_pool():
+    """Waits for running reads and stops the pool (call on shutdown)."""
+    global _read_pool
+    if _read_pool is not None:
+        _read_pool.shutdown(wait=True, cancel_futures=True)
+        _read_pool = None
+
+def submit_read(func, *args):
+    """
+    Runs func(*args) on the read pool and returns a concurrent.futures.Future.
+    Without a running pool the call happens immediately and the Future is already done.
+    """
+    if _read_pool is not None:
+        return _read_pool.submit(func, *args)
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
@@ -1,4 +1,12 @@
 import database as db
+import backup
+import csv
+import io
+import json
+import math
+import re
+import sqlite3
+import numpy as np
 from datetime import datetime, timedelta
 import random
 import time
@@ -10,13 +18,10 @@ from dateutil import parser
 
 def calculate_progress(user_id):
     """Calculates the percentage of completed tasks."""
-    tasks = db.fetch_tasks(user_id)
-    if not tasks:
+    done, total = db.get_task_counts(user_id)
+    if not total:
         return 0.0, 0, 0
     
-    total = len(tasks)
-    done = sum(1 for task in tasks if task['status'] == 1)
-    
     progress_percent = (done / total) * 100
     return progress_percent, done, total
 
@@ -35,13 +40,23 @@ def get_motivational_quote():
 # --- Streak Handling ---
 
 def on_login_check_streak(user_id):
-    """Updates the streak and returns the new value."""
-    new_streak = db.update_streak(user_id)
+    """
+    Works out today's streak and any streak badge, and returns the new value.
+    Only reads: the new streak and badges are queued on the database writer.
+    """
+    progress_data = db.get_progress_data(user_id)
+    old_streak = progress_data['streak_days'] if progress_data else None
+    new_streak, today = db.calculate_streak(user_id)
+    if not progress_data or progress_data['last_login'] != today:
+        db.submit_write("save_streak", user_id, new_streak, today)
     quote = get_motivational_quote()
     
     message = f"Welcome back, tracker! Your current streak is **{new_streak} days**."
     if new_streak > 1:
         message += "\nKeep going, you're building a great habit!"
+
+    for badge in check_streak_rewards(user_id, old_streak, new_streak):
+        message += f"\nNew badge: {badge}"
     
     return message, quote, new_streak
 
@@ -57,12 +72,16 @@ def set_reminder_display_callback(callback):
 
 def reminder_job(user_id):
     """Function to be called by the scheduler."""
-    user = db.get_user_by_name(db.get_progress_data(user_id)['user_id'])
+    user = db.get_user_by_id(user_id)
     
     if user:
         quote = get_motivational_quote()
         title = f"Daily Roadmap Reminder for {user['name']}"
         message = f"Goal: {user['goal']}\nMotivation: '{quote}'\n\nDon't forget to track your progress today!"
+
+        due_reviews = db.count_due_reviews(user_id)
+        if due_reviews:
+            message += f"\n🧠 {due_reviews} skill review(s) due today."
         
         # Use the stored UI callback to show the reminder notification
         if reminder_display_callback:
@@ -77,7 +96,7 @@ def run_scheduler_thread():
         time.sleep(1) # Check every second
 
 def start_reminder_service(user_id, user_name, time_str="10:00"):
-    """Initializes the reminder job and starts the background thread."""
+    """Initializes the reminder job (which also reports due reviews) and starts the background thread."""
     
     # Clear old job for this user/id if it exists
     schedule.clear(str(user_id)) 
@@ -86,19 +105,170 @@ def start_reminder_service(user_id, user_name, time_str="10:00"):
     schedule.every().day.at(time_str).do(reminder_job, user_id).tag(str(user_id))
     print(f"Daily reminder set for {user_name} at {time_str}.")
 
-    # Start the thread only if it's not running
+    ensure_scheduler_thread()
+
+def ensure_scheduler_thread():
+    """Starts the shared scheduler thread only if it's not running."""
     thread_name = 'SchedulerThread'
     if not any(t.name == thread_name for t in threading.enumerate()):
         t = threading.Thread(target=run_scheduler_thread, name=thread_name, daemon=True)
         t.start()
         print("Reminder scheduler thread started.")
 
+def nightly_backup_job(backup_dir):
+    """Starts an online backup on its own thread so the scheduler (and the UI) never wait on it."""
+    dest_path = backup.default_backup_path(backup_dir)
+    backup.start_backup(dest_path, on_done=lambda path, error: print(
+        f"Nightly backup failed: {error}" if error else f"Nightly backup written to {path}."
+    ))
+
+def schedule_nightly_backup(time_str="02:00", backup_dir="data/backups"):
+    """Schedules a daily online backup of the whole database."""
+    schedule.clear('nightly_backup')
+    schedule.every().day.at(time_str).do(nightly_backup_job, backup_dir).tag('nightly_backup')
+    print(f"Nightly backup scheduled at {time_str}.")
+    ensure_scheduler_thread()
+
+_maintenance_lock = threading.Lock()
+
+def start_idle_maintenance(on_done=None):
+    """
+    Runs db.run_maintenance() on a background thread; calls on_done(summary, error).
+    Returns False (and does nothing) while a previous run is still going.
+    """
+    if not _maintenance_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        summary, error = None, None
+        try:
+            summary = db.run_maintenance()
+        except sqlite3.Error as e:
+            error = e
+        finally:
+            _maintenance_lock.release()
+        if on_done:
+            on_done(summary, error)
+        else:
+            print(f"Idle maintenance failed: {error}" if error else f"Idle maintenance done: {summary}")
+
+    threading.Thread(target=run, name="MaintenanceThread", daemon=True).start()
+    return True
+
 
 # --- Roadmap Import and Day-Wise Planning ---
 
-def process_imported_roadmap(user_id, content, overall_deadline_str):
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*)$')
+BULLET_RE = re.compile(r'^(?:[-*+]|\d+[.)])\s+(.*)$')
+SECTION_RE = re.compile(r'^(\d+(?:\.\d+)+)\.?\s+(.*)$') # e.g. "2.1 Pandas", "2.1.3. Joins"
+
+def parse_outline_text(content):
     """
-    Parses imported text content and distributes tasks up to a given deadline.
+    Parses a Markdown / plain-text outline into a pre-order list of (depth, title).
+    Headings, numbered sections (1.2.3) and list indentation all contribute depth;
+    a file with one task per line comes out flat, as before.
+    """
+    nodes = []
+    heading_depth = -1 # depth of the most recent heading (-1: none yet)
+    for raw_line in content.split('\n'):
+        if not raw_line.strip():
+            continue
+        expanded = raw_line.expandtabs(4)
+        indent = (len(expanded) - len(expanded.lstrip())) // 2
+        line = expanded.strip()
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            depth = len(heading.group(1)) - 1
+            nodes.append((depth, heading.group(2).strip()))
+            heading_depth = depth
+            continue
+
+        section = SECTION_RE.match(line)
+        if section:
+            depth = max(heading_depth + 1, section.group(1).count('.'))
+            nodes.append((depth, section.group(2).strip()))
+            continue
+
+        bullet = BULLET_RE.match(line)
+        title = bullet.group(1).strip() if bullet else line
+        nodes.append((heading_depth + 1 + indent, title))
+
+    return _normalize_depths(nodes)
+
+def parse_outline_json(content):
+    """
+    Parses JSON outlines: a list (or {"tasks": [...]}) of strings or objects with
+    "skill"/"title", optional "description" and nested "children".
+    """
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get('tasks') or data.get('children') or [data]
+
+    nodes = []
+    def walk(items, depth):
+        for item in items:
+            if isinstance(item, str):
+                nodes.append((depth, item.strip()))
+                continue
+            title = item.get('skill') or item.get('title') or item.get('name')
+            if not title:
+                raise ValueError("Every JSON roadmap entry needs a 'skill' or 'title'.")
+            nodes.append((depth, title.strip(), item.get('description') or ""))
+            walk(item.get('children') or [], depth + 1)
+    walk(data, 0)
+    return nodes
+
+def parse_outline_csv(content):
+    """
+    Parses CSV outlines with a "skill" column and either a "level" (0 = top) or a
+    "parent" column naming an earlier row's skill. Rows must list parents first.
+    """
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames or 'skill' not in reader.fieldnames:
+        raise ValueError("CSV roadmaps need a 'skill' column.")
+
+    nodes = []
+    depth_by_skill = {}
+    for row in reader:
+        title = (row.get('skill') or '').strip()
+        if not title:
+            continue
+        if row.get('level') not in (None, ''):
+            depth = int(row['level'])
+        elif row.get('parent'):
+            parent = row['parent'].strip()
+            if parent not in depth_by_skill:
+                raise ValueError(f"Parent '{parent}' must appear before '{title}'.")
+            depth = depth_by_skill[parent] + 1
+        else:
+            depth = 0
+        depth_by_skill[title] = depth
+        nodes.append((depth, title, (row.get('description') or '').strip()))
+    return _normalize_depths(nodes)
+
+def _normalize_depths(nodes):
+    """Clamps depths so each node is at most one level below the previous one."""
+    normalized = []
+    previous = -1
+    for depth, *rest in nodes:
+        depth = max(0, min(depth, previous + 1))
+        normalized.append((depth, *rest))
+        previous = depth
+    return normalized
+
+def parse_roadmap_outline(content, fmt="text"):
+    """Dispatches to the outline parser for `fmt` ('text'/'md', 'json' or 'csv')."""
+    if fmt == "json":
+        return parse_outline_json(content)
+    if fmt == "csv":
+        return parse_outline_csv(content)
+    return parse_outline_text(content)
+
+def process_imported_roadmap(user_id, content, overall_deadline_str, fmt="text"):
+    """
+    Parses imported content into a task tree and distributes deadlines up to a given deadline.
+    Leaf tasks are spaced evenly; each parent is due with its last child.
     """
     
     # 1. Determine the overall deadline
@@ -107,13 +277,16 @@ def process_imported_roadmap(user_id, content, overall_deadline_str):
     except Exception:
         raise ValueError("Invalid deadline format. Please use YYYY-MM-DD.")
 
-    # 2. Simple Task Extraction (assuming one task per line or section)
-    task_list = [line.strip() for line in content.split('\n') if line.strip()]
+    # 2. Structured extraction (headings, indentation, numbering -> depth)
+    try:
+        outline = parse_roadmap_outline(content, fmt)
+    except (json.JSONDecodeError, csv.Error) as e:
+        raise ValueError(f"Could not parse the roadmap file: {e}")
     
-    if not task_list:
+    if not outline:
         return 0
         
-    num_tasks = len(task_list)
+    num_tasks = len(outline)
     today = datetime.now().date()
     
     # Calculate total working days in the period
@@ -122,39 +295,215 @@ def process_imported_roadmap(user_id, content, overall_deadline_str):
     if days_left <= 0:
         raise ValueError("Deadline must be in the future.")
 
-    # Calculate how many days to space out between tasks
-    task_spacing = days_left / num_tasks 
+    # A node is a leaf when the next node is not deeper
+    is_leaf = [i + 1 == num_tasks or outline[i + 1][0] <= outline[i][0] for i in range(num_tasks)]
+    num_leaves = sum(is_leaf)
 
-    for i, task_name in enumerate(task_list):
-        # Assign a deadline for this specific task
-        task_deadline = today + timedelta(days=int((i + 1) * task_spacing))
-        
-        # Ensure task deadline doesn't exceed the overall deadline
-        if task_deadline > deadline_date:
-             task_deadline = deadline_date
-        
-        db.add_task(user_id, task_name, "Scheduled from imported roadmap.", task_deadline.strftime("%Y-%m-%d"))
+    # Calculate how many days to space out between leaf tasks
+    task_spacing = days_left / num_leaves
 
-    return num_tasks
+    deadlines = [None] * num_tasks
+    leaf_index = 0
+    for i in range(num_tasks):
+        if is_leaf[i]:
+            leaf_index += 1
+            # Ensure task deadline doesn't exceed the overall deadline
+            deadlines[i] = min(today + timedelta(days=int(leaf_index * task_spacing)), deadline_date)
 
-# --- Badges/Rewards (Logic) ---
+    # Parents inherit the latest deadline in their subtree (walk backwards)
+    for i in range(num_tasks - 1, -1, -1):
+        if not is_leaf[i]:
+            j = i + 1
+            latest = deadlines[j]
+            while j < num_tasks and outline[j][0] > outline[i][0]:
+                latest = max(latest, deadlines[j])
+                j += 1
+            deadlines[i] = latest
 
-def check_for_rewards(user_id, streak_days, progress_percent):
-    """Checks for badge milestones."""
-    rewards = []
-    
-    # Milestone Rewards
-    if progress_percent >= 100.0:
-        rewards.append("🎉 Roadmap Completed! Congratulations!")
-        
-    if 50.0 <= progress_percent < 51.0:
-        rewards.append("🏆 Halfway There! (50% Milestone)")
-        
-    if 25.0 <= progress_percent < 26.0:
-        rewards.append("🌟 Quarter Goal Achieved! (25% Milestone)")
-        
-    # Streak Rewards
-    if streak_days >= 7 and streak_days % 7 == 0:
-        rewards.append(f"🔥 {streak_days}-Day Streak Master!")
-    
-    return rewards
\ No newline at end of file
+    nodes = []
+    for (depth, title, *rest), due in zip(outline, deadlines):
+        description = rest[0] if rest and rest[0] else "Scheduled from imported roadmap."
+        nodes.append((depth, title, description, due.strftime("%Y-%m-%d")))
+
+    num_added = db.add_task_tree(user_id, nodes)
+    db.set_target_date(user_id, deadline_date.strftime("%Y-%m-%d"))
+    return num_added
+
+# --- Burndown, Velocity and Completion Forecast ---
+
+def downsample_series(x, y, max_points=400):
+    """
+    Min/max decimation for long histories: each bucket keeps its lowest and highest
+    point, so the plotted shape (and any spikes) survive with at most `max_points` points.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    edges = np.linspace(0, len(y), max_points // 2 + 1).astype(int)
+    keep = [0, len(y) - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = y[start:end]
+            keep.append(start + int(np.argmin(bucket)))
+            keep.append(start + int(np.argmax(bucket)))
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+def forecast_completion(user_id, velocity_window=7):
+    """
+    Builds the burndown series and projects a finish date from the rolling velocity.
+    Returns None when there are no snapshots yet.
+    """
+    rows = db.fetch_burndown(user_id, velocity_window)
+    if not rows:
+        return None
+
+    days = np.array([row['day'] for row in rows], dtype='datetime64[D]')
+    remaining = np.array([row['remaining'] for row in rows], dtype=float)
+    totals = np.array([row['total'] for row in rows], dtype=float)
+    velocity = rows[-1]['velocity'] or 0.0
+
+    last_day = days[-1].astype(object)
+    if remaining[-1] <= 0:
+        projected_date = last_day
+    elif velocity > 0:
+        projected_date = last_day + timedelta(days=math.ceil(remaining[-1] / velocity))
+    else:
+        projected_date = None # No recent completions: cannot extrapolate
+
+    target = db.get_target_date(user_id)
+    target_date = datetime.strptime(target, "%Y-%m-%d").date() if target else None
+
+    return {
+        "days": days,
+        "remaining": remaining,
+        "totals": totals,
+        "velocity": velocity,
+        "projected_date": projected_date,
+        "target_date": target_date,
+        "on_track": (projected_date is not None and target_date is not None
+                     and projected_date <= target_date),
+    }
+
+# --- Badges/Rewards (Rules Engine) ---
+
+# Progress milestones: awarded once when progress first reaches the threshold
+PROGRESS_BADGE_RULES = [
+    # (badge_key, threshold %, title)
+    ("progress_25", 25.0, "🌟 Quarter Goal Achieved! (25% Milestone)"),
+    ("progress_50", 50.0, "🏆 Halfway There! (50% Milestone)"),
+    ("progress_100", 100.0, "🎉 Roadmap Completed! Congratulations!"),
+]
+
+# Streak milestones: one badge per multiple of this many days
+STREAK_BADGE_INTERVAL = 7
+
+def _progress_badges(old_percent, new_percent):
+    """Rules whose threshold lies in (old, new]; a jump from 49% to 55% still crosses 50%."""
+    low = -1.0 if old_percent is None else old_percent
+    return [(key, title) for key, threshold, title in PROGRESS_BADGE_RULES
+            if low < threshold <= new_percent]
+
+def _streak_badges(old_streak, new_streak):
+    """Every streak milestone crossed on the way from old to new."""
+    low = 0 if old_streak is None or new_streak < old_streak else old_streak
+    first = (low // STREAK_BADGE_INTERVAL + 1) * STREAK_BADGE_INTERVAL
+    return [(f"streak_{days}", f"🔥 {days}-Day Streak Master!")
+            for days in range(first, new_streak + 1, STREAK_BADGE_INTERVAL)]
+
+# Only the rules registered for an event are evaluated when it fires
+REWARD_RULES_BY_EVENT = {
+    "progress": _progress_badges,
+    "streak": _streak_badges,
+}
+
+def evaluate_reward_event(user_id, event, old_value, new_value):
+    """
+    Evaluates the rules affected by a change event ('progress' or 'streak') and
+    queues any badge not earned before on the database writer. Returns their titles.
+    """
+    if old_value == new_value:
+        return []
+    candidates = REWARD_RULES_BY_EVENT[event](old_value, new_value)
+    if not candidates:
+        return []
+    earned = {badge['badge_key'] for badge in db.fetch_earned_badges(user_id)}
+    new_badges = [(key, title) for key, title in candidates if key not in earned]
+    if new_badges:
+        db.submit_write("award_badges", user_id, new_badges)
+    return [title for _key, title in new_badges]
+
+def check_progress_rewards(user_id, old_percent, new_percent):
+    """Awards progress milestones crossed since `old_percent` (None: check all)."""
+    return evaluate_reward_event(user_id, "progress", old_percent, new_percent)
+
+def check_streak_rewards(user_id, old_streak, new_streak):
+    """Awards streak milestones crossed since `old_streak` (None: check all)."""
+    return evaluate_reward_event(user_id, "streak", old_streak, new_streak)
+
+def get_earned_rewards(user_id):
+    """Titles of every badge the user has earned."""
+    return [badge['title'] for badge in db.fetch_earned_badges(user_id)]
+
+# --- Spaced Repetition (SM-2) ---
+
+# Answer buttons offered by the review dialog: (label, SM-2 quality 0-5)
+REVIEW_GRADES = [
+    ("Forgot", 1),
+    ("Hard", 3),
+    ("Good", 4),
+    ("Easy", 5),
+]
+
+def sm2_next(quality, ease, interval_days, repetitions):
+    """
+    One SM-2 step. `quality` is 0-5 (below 3: forgotten, the task starts over).
+    Returns the new (ease, interval_days, repetitions).
+    """
+    if quality < 3:
+        repetitions, interval_days = 0, 1
+    else:
+        if repetitions == 0:
+            interval_days = 1
+        elif repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = round(interval_days * ease)
+        repetitions += 1
+    ease = max(1.3, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return ease, interval_days, repetitions
+
+# --- Dashboard Data (runs on the database read pool) ---
+
+def load_progress(user_id, previous_percent=None):
+    """
+    Returns everything the progress widgets show as one dict. Today's snapshot and
+    progress badges crossed since `previous_percent` are queued on the database
+    writer (only when something changed), so the read pool never writes.
+    """
+    progress, done, total = calculate_progress(user_id)
+    if not db.snapshot_is_current(user_id):
+        db.submit_write("record_daily_snapshot", user_id)
+    rewards = get_earned_rewards(user_id)
+    new_rewards = check_progress_rewards(user_id, previous_percent, progress)
+    return {
+        "progress": progress,
+        "done": done,
+        "total": total,
+        "new_rewards": new_rewards,
+        "rewards": rewards + new_rewards,
+        "due_reviews": db.count_due_reviews(user_id),
+    }
+
+def load_leaderboard_page(sort_key, descending, page, page_size):
+    """Returns one leaderboard page (clamped to the pages that exist) with the paging totals."""
+    total_users = db.count_cohort_users()
+    pages = max(1, (total_users + page_size - 1) // page_size)
+    page = max(0, min(page, pages - 1))
+    return {
+        "rows": db.fetch_leaderboard(sort_key, descending, page_size, page * page_size),
+        "page": page,
+        "pages": pages,
+        "total_users": total_users,
+    }
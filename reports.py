@@ -0,0 +1,265 @@
+"""
+Weekly progress reports for a whole cohort.
+
+Usage: python reports.py [--out data/reports] [--workers N] [--as-of YYYY-MM-DD] [--user NAME ...]
+
+Reports are rendered from a point-in-time snapshot of the database (taken with the
+online backup API, so the app keeps running). A process pool renders the matplotlib
+charts with the headless Agg backend, and every worker writes its own HTML files.
+"""
+import argparse
+import base64
+import html
+import io
+import multiprocessing
+import os
+import re
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import matplotlib
+from matplotlib.figure import Figure
+import backup
+import database as db
+import logic
+
+REPORT_PERIOD_DAYS = 7
+MAX_OPEN_TASKS = 25 # open tasks listed per report, earliest deadline first
+
+# --- Worker Side (one read-only snapshot connection per process) ---
+
+_worker = {}
+
+def _init_worker(snapshot_path, out_dir, as_of):
+    # Only the workers are headless; importing this module leaves the GUI's backend alone
+    matplotlib.use("Agg")
+    conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    _worker.update(conn=conn, out_dir=out_dir, as_of=as_of)
+
+def _load_report_data(conn, user_id, as_of):
+    """Everything one report shows; each query is an indexed lookup for a single user."""
+    week_start = (datetime.strptime(as_of, "%Y-%m-%d") - timedelta(days=REPORT_PERIOD_DAYS - 1)).strftime("%Y-%m-%d")
+    user = conn.execute("""
+        SELECT u.id, u.name, u.goal, u.target_date, s.total, s.done, s.progress, s.streak_days, s.last_login
+        FROM users u LEFT JOIN user_stats s ON s.user_id = u.id
+        WHERE u.id = ?
+    """, (user_id,)).fetchone()
+    completed = conn.execute("""
+        SELECT skill, completed_at FROM (
+            SELECT skill, completed_at FROM roadmap WHERE user_id = ? AND status = 1
+            UNION ALL
+            SELECT skill, completed_at FROM roadmap_archive WHERE user_id = ?
+        )
+        WHERE completed_at >= ? AND completed_at < date(?, '+1 day')
+        ORDER BY completed_at
+    """, (user_id, user_id, week_start, as_of)).fetchall()
+    open_tasks = conn.execute("""
+        SELECT skill, deadline FROM roadmap
+        WHERE user_id = ? AND status = 0
+        ORDER BY deadline IS NULL, deadline, id
+        LIMIT ?
+    """, (user_id, MAX_OPEN_TASKS)).fetchall()
+    return {
+        "user": user,
+        "week_start": week_start,
+        "completed": completed,
+        "open_tasks": open_tasks,
+        "overdue": conn.execute(
+            "SELECT COUNT(*) FROM roadmap WHERE user_id = ? AND status = 0 AND deadline < ?", (user_id, as_of)
+        ).fetchone()[0],
+        "snapshots": conn.execute(
+            "SELECT day, total, done FROM progress_snapshots WHERE user_id = ? AND day <= ? ORDER BY day",
+            (user_id, as_of)
+        ).fetchall(),
+        "badges": [row[0] for row in conn.execute(
+            "SELECT title FROM earned_badges WHERE user_id = ? ORDER BY earned_at, badge_key", (user_id,)
+        )],
+        "due_reviews": conn.execute(
+            "SELECT COUNT(*) FROM reviews WHERE user_id = ? AND due_date <= ?", (user_id, as_of)
+        ).fetchone()[0],
+    }
+
+def _png_data_uri(figure):
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=90)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+def _render_charts(data, as_of):
+    """
+    Returns (progress pie, burndown, completions per day) as embeddable PNG data URIs.
+    Margins are fixed instead of tight_layout(), which would draw every figure twice.
+    """
+    user = data["user"]
+    done, total = user["done"] or 0, user["total"] or 0
+
+    pie = Figure(figsize=(3.5, 3.5))
+    ax = pie.add_subplot()
+    if total:
+        ax.pie([done, total - done], labels=("Completed", "Pending"), colors=("#4CAF50", "#FF9800"),
+               autopct="%1.1f%%", startangle=90)
+        ax.axis("equal")
+    else:
+        ax.text(0.5, 0.5, "No tasks yet", ha="center", va="center", color="#777777")
+        ax.axis("off")
+    ax.set_title(f"Progress ({done}/{total})")
+
+    burndown = Figure(figsize=(6, 3.5))
+    ax = burndown.add_subplot()
+    snapshots = data["snapshots"]
+    if snapshots:
+        first_day = datetime.strptime(snapshots[0]["day"], "%Y-%m-%d")
+        days = [(datetime.strptime(row["day"], "%Y-%m-%d") - first_day).days for row in snapshots]
+        days, remaining = logic.downsample_series(days, [row["total"] - row["done"] for row in snapshots])
+        ax.plot(days, remaining, color="#2196F3")
+        ax.set_xlabel(f"Days since {snapshots[0]['day']}")
+        ax.set_ylabel("Remaining tasks")
+    else:
+        ax.text(0.5, 0.5, "No history yet", ha="center", va="center", color="#777777")
+    ax.set_title("Burndown")
+    burndown.subplots_adjust(left=0.12, right=0.97, top=0.9, bottom=0.15)
+
+    week = Figure(figsize=(6, 2.5))
+    ax = week.add_subplot()
+    start = datetime.strptime(data["week_start"], "%Y-%m-%d")
+    labels = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(REPORT_PERIOD_DAYS)]
+    per_day = dict.fromkeys(labels, 0)
+    for row in data["completed"]:
+        per_day[row["completed_at"][:10]] += 1
+    ax.bar([label[5:] for label in labels], list(per_day.values()), color="#4CAF50")
+    ax.set_title(f"Tasks completed, week ending {as_of}")
+    week.subplots_adjust(left=0.08, right=0.97, top=0.85, bottom=0.15)
+
+    return _png_data_uri(pie), _png_data_uri(burndown), _png_data_uri(week)
+
+def _render_html(data, charts, as_of):
+    user = data["user"]
+    e = html.escape
+    progress = user["progress"] or 0
+    completed = "".join(f"<li>{e(row['skill'])} <small>({e(row['completed_at'][:10])})</small></li>"
+                        for row in data["completed"]) or "<li>Nothing completed this week.</li>"
+    open_rows = "".join(
+        f"<tr class=\"{'overdue' if row['deadline'] and row['deadline'] < as_of else ''}\">"
+        f"<td>{e(row['skill'])}</td><td>{e(row['deadline'] or '-')}</td></tr>"
+        for row in data["open_tasks"]
+    ) or "<tr><td colspan=\"2\">No open tasks.</td></tr>"
+    badges = "".join(f"<li>{e(title)}</li>" for title in data["badges"]) or "<li>None yet.</li>"
+    pie, burndown, week = charts
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Weekly report: {e(user['name'])}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #333; }}
+.stats span {{ display: inline-block; margin-right: 2em; font-size: 1.1em; }}
+table {{ border-collapse: collapse; }} td, th {{ border: 1px solid #ccc; padding: 4px 8px; text-align: left; }}
+tr.overdue td {{ color: #c62828; }}
+</style></head><body>
+<h1>{e(user['name'])}: week {e(data['week_start'])} to {e(as_of)}</h1>
+<p>Goal: {e(user['goal'] or '-')} | Target date: {e(user['target_date'] or '-')}</p>
+<p class="stats"><span>Progress: <b>{progress:.1f}%</b> ({user['done'] or 0}/{user['total'] or 0})</span>
+<span>Streak: <b>{user['streak_days'] or 0} days</b> (last login {e(user['last_login'] or '-')})</span>
+<span>Overdue: <b>{data['overdue']}</b></span><span>Reviews due: <b>{data['due_reviews']}</b></span></p>
+<img src="{pie}" alt="Progress"> <img src="{burndown}" alt="Burndown">
+<h2>Completed this week ({len(data['completed'])})</h2><ul>{completed}</ul>
+<img src="{week}" alt="Completed per day">
+<h2>Open tasks (next {MAX_OPEN_TASKS} by deadline)</h2>
+<table><tr><th>Task</th><th>Deadline</th></tr>{open_rows}</table>
+<h2>Badges</h2><ul>{badges}</ul>
+</body></html>
+"""
+
+def report_file_name(user_id, name):
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", name).strip("_") or "user"
+    return f"{user_id:05d}_{slug}.html"
+
+def _write_report(user_id):
+    """Renders and writes one report inside a pool worker. Returns (user_id, path, error)."""
+    conn, out_dir, as_of = _worker["conn"], _worker["out_dir"], _worker["as_of"]
+    try:
+        data = _load_report_data(conn, user_id, as_of)
+        if data["user"] is None:
+            return user_id, None, "unknown user"
+        page = _render_html(data, _render_charts(data, as_of), as_of)
+        path = os.path.join(out_dir, report_file_name(user_id, data["user"]["name"]))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(page)
+        return user_id, path, None
+    except Exception as e:
+        # One broken report (bad data, a matplotlib error) must not stop the batch
+        return user_id, None, f"{type(e).__name__}: {e}"
+
+# --- Batch Driver ---
+
+def generate_cohort_reports(out_dir="data/reports", user_ids=None, workers=None, as_of=None, progress=None):
+    """
+    Writes one HTML report per user (all users by default) into `out_dir`, plus an index.html.
+    Returns (written paths, {user_id: error}). `progress(done, total)` is called as reports finish.
+    """
+    as_of = as_of or datetime.now().strftime("%Y-%m-%d")
+    os.makedirs(out_dir, exist_ok=True)
+    db.flush_writes()
+
+    # Every worker reads the same consistent snapshot, never the live database
+    # (kept in a private temporary directory, away from the reports)
+    with tempfile.TemporaryDirectory(prefix="roadmap_reports_") as snapshot_dir:
+        snapshot_path = os.path.join(snapshot_dir, "snapshot.db")
+        backup.backup_database(snapshot_path)
+        # A rollback-journal snapshot lets read-only workers open it without -wal/-shm files
+        conn = sqlite3.connect(snapshot_path)
+        try:
+            conn.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            conn.close()
+        if user_ids is None:
+            conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+            try:
+                user_ids = [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")]
+            finally:
+                conn.close()
+        workers = min(workers or os.cpu_count() or 1, max(1, len(user_ids)))
+        chunksize = max(1, len(user_ids) // (workers * 4))
+
+        paths, errors = [], {}
+        # spawn: workers never inherit the GUI's threads or open connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(snapshot_path, out_dir, as_of)) as pool:
+            for user_id, path, error in pool.map(_write_report, user_ids, chunksize=chunksize):
+                if error:
+                    errors[user_id] = error
+                else:
+                    paths.append(path)
+                if progress:
+                    progress(len(paths) + len(errors), len(user_ids))
+
+    _write_index(out_dir, paths, as_of)
+    return paths, errors
+
+def _write_index(out_dir, paths, as_of):
+    links = "".join(f"<li><a href=\"{html.escape(os.path.basename(p))}\">{html.escape(os.path.basename(p))}</a></li>"
+                    for p in sorted(paths))
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Weekly reports {html.escape(as_of)}"
+                f"</title></head><body><h1>Weekly reports, week ending {html.escape(as_of)}</h1>"
+                f"<ul>{links}</ul></body></html>\n")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Generate weekly progress reports for the whole cohort.")
+    arg_parser.add_argument("--out", default="data/reports")
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--as-of", default=None, help="last day of the report week (YYYY-MM-DD)")
+    arg_parser.add_argument("--user", action="append", help="only this user (repeatable)")
+    args = arg_parser.parse_args()
+
+    db.setup_database() # brings older databases up to the schema the reports read
+    user_ids = None
+    if args.user:
+        users = [db.get_user_by_name(name) for name in args.user]
+        user_ids = [user['id'] for user in users if user]
+    started = datetime.now()
+    paths, errors = generate_cohort_reports(args.out, user_ids, args.workers, args.as_of)
+    for user_id, error in errors.items():
+        print(f"User {user_id}: {error}")
+    print(f"{len(paths)} report(s) written to {args.out} in {(datetime.now() - started).total_seconds():.1f}s.")
+
+if __name__ == '__main__':
+    main()
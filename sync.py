@@ -0,0 +1,42 @@
+import json
+import urllib.request
+import database as db
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765"
+
+def _post_json(url, payload, timeout):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+def sync_user(user_id, server_url=DEFAULT_SERVER_URL, timeout=10):
+    """
+    Exchanges deltas with a sync server in one round trip:
+    pushes local changes since the last acknowledged local sequence and pulls
+    other devices' changes since the last seen server sequence.
+    Returns (pushed, pulled) change counts.
+    """
+    server_url = server_url.rstrip("/")
+    user = db.get_user_by_id(user_id)
+    if not user:
+        raise ValueError("Unknown user.")
+
+    state = db.get_sync_state(user_id, server_url)
+    last_pushed_seq, last_pulled_seq = state if state else (None, 0)
+
+    # First sync with a server sends every local task; later syncs only the delta
+    changes, latest_seq = db.fetch_local_changes(user_id, last_pushed_seq)
+    response = _post_json(f"{server_url}/sync", {
+        "user": user['name'],
+        "device_id": db.get_device_id(),
+        "since": last_pulled_seq,
+        "changes": changes,
+    }, timeout)
+
+    # Pulled changes are logged as remote-origin rows, so they are never pushed back
+    pulled = db.apply_remote_changes(user_id, response["changes"])
+    db.save_sync_state(user_id, server_url, latest_seq, response["latest_seq"])
+    return len(changes), pulled
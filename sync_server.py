@@ -0,0 +1,119 @@
+"""
+Reference sync server for local testing.
+
+Usage: python sync_server.py [--host 127.0.0.1] [--port 8765] [--db data/sync_server.db]
+
+Stores the latest version of every task per user and a monotonically increasing
+server sequence. POST /sync pushes a device's changes and returns every change
+from other devices after the client's last seen sequence.
+"""
+import argparse
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class SyncStore:
+    """Last-writer-wins store: the higher (updated_at, device_id) version of a task wins."""
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_key TEXT NOT NULL,
+                    uid TEXT NOT NULL,
+                    device_id TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    UNIQUE (user_key, uid)
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_user_seq ON changes(user_key, seq)")
+
+    def sync(self, user_key, device_id, since, changes):
+        """Applies pushed changes, then returns (changes for this device, latest sequence)."""
+        with self.lock, self.conn:
+            for change in changes:
+                current = self.conn.execute(
+                    "SELECT updated_at, device_id FROM changes WHERE user_key = ? AND uid = ?",
+                    (user_key, change["uid"])
+                ).fetchone()
+                if current and (change["updated_at"], device_id) <= (current["updated_at"], current["device_id"]):
+                    continue
+                # Delete + insert gives the winning version a new (higher) sequence number
+                self.conn.execute("DELETE FROM changes WHERE user_key = ? AND uid = ?", (user_key, change["uid"]))
+                self.conn.execute(
+                    "INSERT INTO changes (user_key, uid, device_id, updated_at, payload) VALUES (?, ?, ?, ?, ?)",
+                    (user_key, change["uid"], device_id, change["updated_at"], json.dumps(change))
+                )
+
+            rows = self.conn.execute(
+                "SELECT seq, device_id, payload FROM changes WHERE user_key = ? AND seq > ? ORDER BY seq",
+                (user_key, since)
+            ).fetchall()
+            latest = self.conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM changes WHERE user_key = ?", (user_key,)
+            ).fetchone()[0]
+
+        outgoing = []
+        for row in rows:
+            if row["device_id"] == device_id:
+                continue
+            change = json.loads(row["payload"])
+            change["device_id"] = row["device_id"]
+            outgoing.append(change)
+        return outgoing, latest
+
+def make_handler(store):
+    class SyncHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/sync":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length).decode("utf-8"))
+                changes, latest = store.sync(
+                    request["user"], request["device_id"], int(request.get("since") or 0), request.get("changes", [])
+                )
+            except (ValueError, KeyError) as e:
+                self._send(400, {"error": str(e)})
+                return
+            self._send(200, {"changes": changes, "latest_seq": latest})
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return SyncHandler
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Reference sync server for the Student Roadmap Tracker.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--db", default="data/sync_server.db")
+    args = arg_parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(SyncStore(args.db)))
+    print(f"Sync server listening on http://{args.host}:{args.port} (store: {args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
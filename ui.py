@@ -1,17 +1,24 @@
 import sys
 import os 
+import threading
+import time
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QStackedWidget, QVBoxLayout, 
     QHBoxLayout, QLabel, QLineEdit, QPushButton, QTableWidget, 
     QTableWidgetItem, QHeaderView, QProgressBar, QMessageBox, 
-    QFileDialog, QInputDialog, QStyleFactory
+    QFileDialog, QInputDialog, QStyleFactory, QAbstractItemView, QDialog, QComboBox
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QObject, QEvent, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon, QColor
 import database as db
 import logic
+import backup
+import sync
+import reports
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
 import pypdf
 
 # --- THEME DEFINITION (QStyleSheet - QSS) ---
@@ -130,8 +137,72 @@ STUDENT_THEME_QSS = """
     }
 """
 
+# How often to check for changes from other instances, and when to reload instead of patching rows
+CHANGE_POLL_INTERVAL_MS = 3000
+MAX_INCREMENTAL_CHANGES = 500
+
+# Maintenance (archiving, vacuum, ANALYZE) starts after this much idle time, at most once per interval
+IDLE_MAINTENANCE_DELAY_MS = 2 * 60 * 1000
+MAINTENANCE_MIN_INTERVAL_S = 60 * 60
+USER_INPUT_EVENTS = (QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.Wheel)
+
+# Bookkeeping writes (dashboard loads, cohort roll-forward); committing them does not need a reload
+DASHBOARD_BOOKKEEPING_WRITES = {"save_streak", "record_daily_snapshot", "award_badges", "refresh_overdue_counts"}
+
 # --- Custom Widgets ---
 
+class DatabaseWriteSignals(QObject):
+    """Carries commit notifications from the database writer thread to the GUI thread."""
+    writes_committed = pyqtSignal(object, object) # (batch, errors)
+
+class BackgroundJobSignals(QObject):
+    """Reports completion of backup/export/import threads to the GUI thread."""
+    finished = pyqtSignal(str, object, object) # (job name, result, error)
+
+class ReminderSignals(QObject):
+    """Carries due reminders from the scheduler thread to the GUI thread."""
+    reminder_due = pyqtSignal(str, str) # (title, message)
+
+class AsyncReader(QObject):
+    """
+    Runs reads on the database read pool and hands results to callbacks on the GUI thread.
+    Every request bumps a per-key generation; a result whose request was superseded
+    in the meantime is stale and goes to `on_stale` (if given) instead of `on_result`.
+    """
+    loaded = pyqtSignal(str, int, object, object) # (key, generation, result, error)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generations = {}
+        self.callbacks = {} # (key, generation) -> (on_result, on_error, on_stale)
+        self.loaded.connect(self.deliver)
+
+    def request(self, key, func, args, on_result, on_error=None, on_stale=None):
+        generation = self.generations.get(key, 0) + 1
+        self.generations[key] = generation
+        self.callbacks[(key, generation)] = (on_result, on_error, on_stale)
+
+        def done(future):
+            if not future.cancelled():
+                error = future.exception()
+                self.loaded.emit(key, generation, None if error else future.result(), error)
+        db.submit_read(func, *args).add_done_callback(done)
+
+    def is_loading(self, key):
+        return (key, self.generations.get(key)) in self.callbacks
+
+    def deliver(self, key, generation, result, error):
+        on_result, on_error, on_stale = self.callbacks.pop((key, generation))
+        if generation != self.generations[key]:
+            if on_stale and error is None:
+                on_stale(result)
+        elif error is None:
+            on_result(result)
+        elif on_error:
+            on_error(error)
+        else:
+            QMessageBox.critical(None, "Database Error", f"Loading data failed: {error}")
+
 class ProgressChart(QWidget):
     """Widget to display progress chart using Matplotlib."""
     def __init__(self, user_id):
@@ -149,10 +220,12 @@ class ProgressChart(QWidget):
         
         self.update_chart()
 
-    def update_chart(self):
+    def update_chart(self, done=None, total=None):
+        """Redraws the pie; counts already loaded elsewhere can be passed in to skip the query."""
         self.ax.clear()
         
-        progress, done, total = logic.calculate_progress(self.user_id)
+        if done is None:
+            _progress, done, total = logic.calculate_progress(self.user_id)
         
         if total == 0:
             self.ax.text(0.5, 0.5, "No tasks added yet!", ha='center', va='center', fontsize=12, color='#777777')
@@ -170,6 +243,254 @@ class ProgressChart(QWidget):
         self.figure.tight_layout()
         self.canvas.draw()
 
+class BurndownDialog(QDialog):
+    """Burndown chart with rolling velocity and projected finish date."""
+    def __init__(self, user_id, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Burndown & Forecast")
+        self.resize(800, 500)
+        layout = QVBoxLayout(self)
+
+        # A standalone Figure is not registered with pyplot, so it is freed with the dialog
+        self.figure = Figure(figsize=(8, 4))
+        self.ax = self.figure.add_subplot()
+        self.figure.patch.set_facecolor('#F5F5F5')
+        self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(self.canvas)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setObjectName("GoalLabel")
+        layout.addWidget(self.summary_label)
+
+        self.plot(logic.forecast_completion(user_id))
+
+    def plot(self, forecast):
+        self.ax.clear()
+        if forecast is None:
+            self.ax.text(0.5, 0.5, "No history yet!", ha='center', va='center', fontsize=12, color='#777777')
+            self.canvas.draw()
+            return
+
+        days, remaining = logic.downsample_series(forecast["days"], forecast["remaining"])
+        self.ax.plot(days, remaining, color='#2196F3', label='Remaining tasks')
+
+        last_day, last_remaining = forecast["days"][-1], forecast["remaining"][-1]
+        if forecast["target_date"]:
+            target = np.datetime64(forecast["target_date"], 'D')
+            self.ax.plot([forecast["days"][0], target], [forecast["totals"][0], 0],
+                         color='#9E9E9E', linestyle=':', label='Ideal')
+            self.ax.axvline(target, color='#FF5722', linewidth=1, label='Deadline')
+        if forecast["projected_date"] and last_remaining > 0:
+            self.ax.plot([last_day, np.datetime64(forecast["projected_date"], 'D')], [last_remaining, 0],
+                         color='#4CAF50', linestyle='--', label='Projection')
+
+        self.ax.set_ylabel("Tasks remaining")
+        self.ax.legend(loc='upper right')
+        self.figure.autofmt_xdate()
+        self.figure.tight_layout()
+        self.canvas.draw()
+
+        summary = f"Velocity: {forecast['velocity']:.2f} tasks/day"
+        if forecast["projected_date"]:
+            summary += f" | Projected finish: {forecast['projected_date']}"
+        else:
+            summary += " | Projected finish: not enough recent progress"
+        if forecast["target_date"]:
+            status = "on track ✅" if forecast["on_track"] else "behind schedule ⚠️"
+            summary += f" | Deadline: {forecast['target_date']} ({status})"
+        self.summary_label.setText(summary)
+
+class ReviewDialog(QDialog):
+    """Today's spaced-repetition queue, one completed skill at a time."""
+    BATCH_SIZE = 50
+
+    def __init__(self, user_id, reader, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Skill Reviews")
+        self.resize(500, 300)
+        self.user_id = user_id
+        self.reader = reader
+        self.queue = []
+        self.reviewed = 0
+        layout = QVBoxLayout(self)
+
+        self.skill_label = QLabel("")
+        self.skill_label.setObjectName("GoalLabel")
+        self.skill_label.setWordWrap(True)
+        layout.addWidget(self.skill_label)
+
+        self.description_label = QLabel("")
+        self.description_label.setWordWrap(True)
+        layout.addWidget(self.description_label)
+        layout.addStretch(1)
+
+        layout.addWidget(QLabel("How well do you still remember this skill?"))
+        grades_layout = QHBoxLayout()
+        self.grade_buttons = []
+        for label, quality in logic.REVIEW_GRADES:
+            btn = QPushButton(label)
+            btn.clicked.connect(lambda _checked, q=quality: self.grade(q))
+            grades_layout.addWidget(btn)
+            self.grade_buttons.append(btn)
+        layout.addLayout(grades_layout)
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #777777; font-style: italic;")
+        layout.addWidget(self.status_label)
+
+        self.load_queue()
+
+    def load_queue(self):
+        """Fetches the next batch of due reviews (an index range scan) on the read pool."""
+        for btn in self.grade_buttons:
+            btn.setEnabled(False)
+        self.status_label.setText("⏳ Loading reviews...")
+        self.reader.request("reviews", db.fetch_due_reviews, (self.user_id, None, self.BATCH_SIZE), self.show_queue)
+
+    def show_queue(self, reviews):
+        self.queue = list(reviews)
+        self.show_next()
+
+    def show_next(self):
+        if not self.queue:
+            self.skill_label.setText("🎉 No reviews due. Come back tomorrow!")
+            self.description_label.setText("")
+            self.status_label.setText(f"Reviewed today: {self.reviewed}")
+            return
+        review = self.queue[0]
+        self.skill_label.setText(review['skill'])
+        self.description_label.setText(review['description'] or "")
+        self.status_label.setText(f"Reviewed: {self.reviewed} | Due since {review['due_date']} | "
+                                  f"Current interval: {review['interval_days']} day(s)")
+        for btn in self.grade_buttons:
+            btn.setEnabled(True)
+
+    def grade(self, quality):
+        review = self.queue.pop(0)
+        ease, interval_days, repetitions = logic.sm2_next(
+            quality, review['ease'], review['interval_days'], review['repetitions']
+        )
+        db.submit_write("record_review", review['task_id'], ease, interval_days, repetitions)
+        self.reviewed += 1
+        if self.queue:
+            self.show_next()
+        else:
+            self.load_queue()
+
+class CohortDialog(QDialog):
+    """Class-wide leaderboard, paged and sorted entirely in SQL over user_stats."""
+    PAGE_SIZE = 50
+    SORT_OPTIONS = [("Progress", "progress", True), ("Streak", "streak", True),
+                    ("Overdue (most first)", "overdue", True), ("Overdue (fewest first)", "overdue", False),
+                    ("Name", "name", False)]
+
+    def __init__(self, reader, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Cohort Leaderboard")
+        self.resize(800, 600)
+        self.reader = reader
+        self.page = 0
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Sort by:"))
+        self.sort_combo = QComboBox()
+        for label, _key, _descending in self.SORT_OPTIONS:
+            self.sort_combo.addItem(label)
+        self.sort_combo.currentIndexChanged.connect(self.reset_and_load)
+        controls.addWidget(self.sort_combo)
+        controls.addStretch(1)
+
+        self.prev_btn = QPushButton("◀ Prev")
+        self.prev_btn.clicked.connect(lambda: self.change_page(-1))
+        controls.addWidget(self.prev_btn)
+        self.page_label = QLabel("")
+        controls.addWidget(self.page_label)
+        self.next_btn = QPushButton("Next ▶")
+        self.next_btn.clicked.connect(lambda: self.change_page(1))
+        controls.addWidget(self.next_btn)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(6)
+        self.table.setHorizontalHeaderLabels(["Rank", "Student", "Progress", "Streak", "Overdue", "Goal"])
+        self.table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.report_btn = QPushButton("📄 Generate Weekly Reports")
+        self.report_btn.clicked.connect(self.generate_reports)
+        layout.addWidget(self.report_btn)
+        self.job_signals = BackgroundJobSignals()
+        self.job_signals.finished.connect(self.on_reports_finished)
+
+        # Overdue counts are rolled forward by the writer; the first page load waits for it
+        db.submit_write("refresh_overdue_counts")
+        self.load_page()
+
+    def generate_reports(self):
+        out_dir = QFileDialog.getExistingDirectory(self, "Save Reports To", "data")
+        if not out_dir:
+            return
+        self.report_btn.setEnabled(False)
+        self.report_btn.setText("⏳ Generating reports...")
+
+        # The process pool runs off the GUI thread; this thread only waits for it
+        def run():
+            try:
+                result, error = reports.generate_cohort_reports(out_dir), None
+            except Exception as e:
+                result, error = None, e
+            self.job_signals.finished.emit("Reports", result, error)
+        threading.Thread(target=run, name="ReportsThread", daemon=True).start()
+
+    def on_reports_finished(self, job_name, result, error):
+        self.report_btn.setEnabled(True)
+        self.report_btn.setText("📄 Generate Weekly Reports")
+        if error:
+            QMessageBox.critical(self, "Reports Error", f"Report generation failed: {error}")
+            return
+        paths, errors = result
+        message = f"{len(paths)} report(s) written."
+        if errors:
+            message += f"\n{len(errors)} failed: " + ", ".join(f"user {u} ({e})" for u, e in list(errors.items())[:5])
+        QMessageBox.information(self, "Reports Ready", message)
+
+    def reset_and_load(self):
+        self.page = 0
+        self.load_page()
+
+    def change_page(self, step):
+        self.page += step
+        self.load_page()
+
+    def load_page(self):
+        """Loads the current page on the read pool; paging is disabled until it arrives."""
+        _label, sort_key, descending = self.SORT_OPTIONS[self.sort_combo.currentIndex()]
+        self.prev_btn.setEnabled(False)
+        self.next_btn.setEnabled(False)
+        self.page_label.setText("⏳ Loading...")
+        self.reader.request("cohort", logic.load_leaderboard_page,
+                            (sort_key, descending, self.page, self.PAGE_SIZE), self.show_page)
+
+    def show_page(self, data):
+        rows, pages, total_users = data["rows"], data["pages"], data["total_users"]
+        self.page = data["page"]
+        self.table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            values = [str(row['rank']), row['name'], f"{row['progress']:.1f}% ({row['done']}/{row['total']})",
+                      f"🔥 {row['active_streak']}", str(row['overdue']), row['goal'] or ""]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 4 and row['overdue'] > 0:
+                    item.setForeground(Qt.red)
+                self.table.setItem(row_index, column, item)
+
+        self.page_label.setText(f"Page {self.page + 1}/{pages} ({total_users} students)")
+        self.prev_btn.setEnabled(self.page > 0)
+        self.next_btn.setEnabled(self.page < pages - 1)
+
 # --- Main Screens ---
 
 class LoginScreen(QWidget):
@@ -209,6 +530,11 @@ class LoginScreen(QWidget):
         self.create_btn.setMaximumWidth(400)
         layout.addWidget(self.create_btn, alignment=Qt.AlignCenter)
         
+        self.cohort_btn = QPushButton("👥 Cohort Leaderboard")
+        self.cohort_btn.clicked.connect(lambda: CohortDialog(self.main_window.reader, self).exec_())
+        self.cohort_btn.setMaximumWidth(400)
+        layout.addWidget(self.cohort_btn, alignment=Qt.AlignCenter)
+        
         # Spacer
         layout.addSpacing(50)
         info_label = QLabel("Use a unique name to track your progress.")
@@ -221,7 +547,22 @@ class LoginScreen(QWidget):
             QMessageBox.warning(self, "Error", "Please enter your name.")
             return
 
-        user_data = db.get_user_by_name(name)
+        self.set_busy(True)
+        self.main_window.reader.request("login", db.get_user_by_name, (name,), self.on_user_loaded,
+                                        on_error=self.on_login_failed)
+
+    def set_busy(self, busy):
+        """Loading state while the user lookup runs on the read pool."""
+        self.login_btn.setText("⏳ Logging in..." if busy else "🔑 Login")
+        self.login_btn.setEnabled(not busy)
+        self.create_btn.setEnabled(not busy)
+
+    def on_login_failed(self, error):
+        self.set_busy(False)
+        QMessageBox.critical(self, "Error", f"Login failed: {error}")
+
+    def on_user_loaded(self, user_data):
+        self.set_busy(False)
         if user_data:
             self.main_window.current_user_id = user_data['id']
             self.main_window.current_user_name = user_data['name']
@@ -253,8 +594,18 @@ class DashboardScreen(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
+        self.last_progress = (None, None) # (user_id, percent) seen by the last refresh
+        self.announced_rewards = set() # (user_id, title) already shown; overlapping loads may report a badge twice
+        self.change_watcher = None
+        self.sync_server_url = sync.DEFAULT_SERVER_URL
         self.init_ui()
 
+        # Low-frequency poll for commits made by other instances on the same database
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setInterval(CHANGE_POLL_INTERVAL_MS)
+        self.watch_timer.timeout.connect(self.poll_external_changes)
+        self.watch_timer.start()
+
     def init_ui(self):
         main_layout = QVBoxLayout(self)
         
@@ -273,6 +624,11 @@ class DashboardScreen(QWidget):
         
         top_layout.addStretch(1) 
 
+        self.cohort_btn = QPushButton("👥 Cohort")
+        self.cohort_btn.clicked.connect(lambda: CohortDialog(self.main_window.reader, self).exec_())
+        self.cohort_btn.setStyleSheet("QPushButton { background-color: #E0E0E0; color: #333333; border: 1px solid #777777; padding: 5px 15px; border-radius: 10px; } QPushButton:hover { background-color: #CCCCCC; }")
+        top_layout.addWidget(self.cohort_btn)
+
         self.logout_btn = QPushButton("🚪 Logout")
         self.logout_btn.clicked.connect(self.main_window.switch_to_login)
         self.logout_btn.setStyleSheet("QPushButton { background-color: #E0E0E0; color: #333333; border: 1px solid #777777; padding: 5px 15px; border-radius: 10px; } QPushButton:hover { background-color: #CCCCCC; }")
@@ -287,14 +643,44 @@ class DashboardScreen(QWidget):
         # Content Area (Table + Chart/Actions)
         content_layout = QHBoxLayout()
         
-        # Left Side: Roadmap Table
+        # Left Side: Bulk Actions + Roadmap Table
+        table_layout = QVBoxLayout()
+
+        bulk_layout = QHBoxLayout()
+        self.selection_label = QLabel("Selected: 0")
+        bulk_layout.addWidget(self.selection_label)
+        self.loading_label = QLabel("")
+        self.loading_label.setStyleSheet("color: #777777; font-style: italic;")
+        bulk_layout.addWidget(self.loading_label)
+        bulk_layout.addStretch(1)
+
+        self.bulk_buttons = []
+        for text, handler in (("Mark Done", lambda: self.bulk_set_status(1)),
+                              ("Mark Pending", lambda: self.bulk_set_status(0)),
+                              ("📅 Reschedule", self.bulk_reschedule),
+                              ("🗑️ Delete", self.bulk_delete)):
+            btn = QPushButton(text)
+            btn.setEnabled(False)
+            btn.clicked.connect(handler)
+            bulk_layout.addWidget(btn)
+            self.bulk_buttons.append(btn)
+        table_layout.addLayout(bulk_layout)
+
         self.task_table = QTableWidget()
         self.task_table.setColumnCount(5)
         self.task_table.setHorizontalHeaderLabels(["ID", "Skill/Task", "Deadline", "Status", "Actions"])
         self.task_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.task_table.setColumnHidden(0, True) 
         self.task_table.verticalHeader().setVisible(False)
-        content_layout.addWidget(self.task_table, 2) 
+        self.task_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.task_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.task_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.task_table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.task_table.cellDoubleClicked.connect(self.toggle_collapse)
+        self.collapsed_task_ids = set()
+        self.row_tree = []
+        table_layout.addWidget(self.task_table)
+        content_layout.addLayout(table_layout, 2) 
 
         # Right Side: Chart and Add/Import Task Buttons
         right_layout = QVBoxLayout()
@@ -314,6 +700,35 @@ class DashboardScreen(QWidget):
         self.import_btn.clicked.connect(self.handle_import_roadmap)
         button_layout.addWidget(self.import_btn)
 
+        data_layout = QHBoxLayout()
+        self.backup_btn = QPushButton("💾 Backup")
+        self.backup_btn.clicked.connect(self.handle_backup)
+        data_layout.addWidget(self.backup_btn)
+
+        self.export_btn = QPushButton("⬇️ Export")
+        self.export_btn.clicked.connect(self.handle_export_data)
+        data_layout.addWidget(self.export_btn)
+
+        self.import_data_btn = QPushButton("⬆️ Import Data")
+        self.import_data_btn.clicked.connect(self.handle_import_data)
+        data_layout.addWidget(self.import_data_btn)
+
+        self.sync_btn = QPushButton("🔄 Sync")
+        self.sync_btn.clicked.connect(self.handle_sync)
+        data_layout.addWidget(self.sync_btn)
+        button_layout.addLayout(data_layout)
+
+        self.job_signals = BackgroundJobSignals()
+        self.job_signals.finished.connect(self.on_background_job_finished)
+
+        self.burndown_btn = QPushButton("📉 Burndown & Forecast")
+        self.burndown_btn.clicked.connect(self.show_burndown)
+        button_layout.addWidget(self.burndown_btn)
+
+        self.review_btn = QPushButton("🧠 Reviews")
+        self.review_btn.clicked.connect(self.show_reviews)
+        button_layout.addWidget(self.review_btn)
+
         right_layout.addLayout(button_layout)
         
         self.reward_label = QLabel("")
@@ -326,134 +741,333 @@ class DashboardScreen(QWidget):
         main_layout.addLayout(content_layout)
 
     def update_dashboard(self):
-        """Called on login and after every task update."""
+        """Called on login and after every task update. Data is loaded on the read pool."""
         user_id = self.main_window.current_user_id
+
+        # Everything committed before this full reload counts as seen by the change watcher
+        if self.change_watcher is None or self.change_watcher.user_id != user_id:
+            if self.change_watcher is not None:
+                self.change_watcher.close()
+            self.change_watcher = db.ChangeWatcher(user_id)
+        else:
+            self.change_watcher.reset()
         
         self.goal_label.setText(f"Goal: {self.main_window.current_user_goal}")
         
-        # Streak logic: Check streak, get motivational quote
-        login_message, quote, streak = logic.on_login_check_streak(user_id)
+        # Streak logic: Check streak, get motivational quote (popup only when the dashboard opens)
+        opening = self.main_window.central_widget.currentWidget() != self
+        self.main_window.reader.request("streak", logic.on_login_check_streak, (user_id,),
+                                        lambda result: self.show_streak(result, opening))
+
+        # 2-3. Update Progress Bar, Chart and Rewards
+        self.refresh_progress(user_id)
+
+        # 4. Populate Task Table
+        self.populate_task_table(user_id)
+
+        # 5. Start Reminders (using a fixed time for now)
+        logic.start_reminder_service(user_id, self.main_window.current_user_name, "10:00")
+
+    def show_streak(self, result, opening):
+        login_message, quote, streak = result
         self.streak_label.setText(f"🔥 Streak: {streak} days")
-        
-        if self.main_window.central_widget.currentWidget() != self:
-             self.show_motivational_popup(login_message, quote)
+        if opening:
+            self.show_motivational_popup(login_message, quote)
+
+    def refresh_progress(self, user_id):
+        """Reloads the progress bar, chart and reward list; new badges are announced on arrival."""
+        # Only progress milestones crossed since the last refresh are evaluated
+        last_user_id, last_progress = self.last_progress
+        previous = last_progress if last_user_id == user_id else None
+        self.progress_bar.setFormat("⏳ Loading progress...")
+        self.main_window.reader.request(
+            "progress", logic.load_progress, (user_id, previous),
+            lambda data: self.show_progress(user_id, data),
+            # A superseded load may still have awarded a badge: announce it, skip the stale numbers
+            on_stale=lambda data: self.announce_rewards(data["new_rewards"], user_id)
+        )
 
-        # 2. Update Progress Bar and Chart
-        progress, done, total = logic.calculate_progress(user_id)
+    def show_progress(self, user_id, data):
+        done, total = data["done"], data["total"]
         self.progress_bar.setMaximum(total if total > 0 else 1)
         self.progress_bar.setValue(done)
         self.progress_bar.setFormat(f"Progress: %p% ({done}/{total} tasks)")
 
         self.chart_widget.user_id = user_id
-        self.chart_widget.update_chart()
-        
-        # 3. Update Rewards (Passive Display)
-        rewards = logic.check_for_rewards(user_id, streak, progress)
-        self.reward_label.setText("🎖️ Active Rewards:\n" + "\n".join(rewards) if rewards else "")
+        self.chart_widget.update_chart(done, total)
+        self.last_progress = (user_id, data["progress"])
 
-        # 4. Populate Task Table
-        self.populate_task_table(user_id)
+        due_reviews = data["due_reviews"]
+        self.review_btn.setText(f"🧠 Reviews ({due_reviews} due)" if due_reviews else "🧠 Reviews")
 
-        # 5. Start Reminders (using a fixed time for now)
-        logic.start_reminder_service(user_id, self.main_window.current_user_name, "10:00")
+        rewards = data["rewards"]
+        self.reward_label.setText("🎖️ Earned Rewards:\n" + "\n".join(rewards) if rewards else "")
+        self.announce_rewards(data["new_rewards"], user_id)
+
+    def announce_rewards(self, new_rewards, user_id=None):
+        if user_id is not None and user_id != self.main_window.current_user_id:
+            return # The user logged out while the data was loading
+        new_rewards = [title for title in new_rewards if (user_id, title) not in self.announced_rewards]
+        self.announced_rewards.update((user_id, title) for title in new_rewards)
+        if new_rewards:
+            QMessageBox.information(self, "✨ Reward Unlocked! ✨", 
+                                    "\n".join(new_rewards) + "\n\nCongratulations on your achievement!")
+
+    # --- Cross-Process Change Detection ---
+
+    def poll_external_changes(self):
+        """Timer slot: applies tasks changed by other app instances, if any."""
+        if self.change_watcher is None or self.main_window.central_widget.currentWidget() != self:
+            return
+        # A full reload in flight would overwrite patched rows; its changes are picked up next tick
+        if self.main_window.reader.is_loading("tasks"):
+            return
+        changes = self.change_watcher.poll()
+        if changes:
+            self.apply_task_changes(*changes)
+
+    def apply_task_changes(self, changed, deleted_ids):
+        """Patches only the affected table rows instead of reloading the whole roadmap."""
+        user_id = self.main_window.current_user_id
+        if len(changed) + len(deleted_ids) > MAX_INCREMENTAL_CHANGES:
+            self.populate_task_table(user_id)
+            self.refresh_progress(user_id)
+            return
+
+        row_of = {task_id: row for row, (task_id, _depth) in enumerate(self.row_tree)}
+        for row in sorted((row_of[t] for t in deleted_ids if t in row_of), reverse=True):
+            self.task_table.removeRow(row)
+            del self.row_tree[row]
+        row_of = {task_id: row for row, (task_id, _depth) in enumerate(self.row_tree)}
+
+        # Records arrive ordered by id, so a new parent is placed before its new children
+        for task in changed:
+            if task.id in row_of:
+                row = row_of[task.id]
+                task.depth = self.row_tree[row][1]
+            else:
+                if task.parent_id in row_of:
+                    parent_row = row_of[task.parent_id]
+                    task.depth = self.row_tree[parent_row][1] + 1
+                    row = parent_row + 1
+                    while row < len(self.row_tree) and self.row_tree[row][1] >= task.depth:
+                        row += 1
+                else:
+                    task.depth = 0
+                    row = len(self.row_tree)
+                self.task_table.insertRow(row)
+                self.row_tree.insert(row, (task.id, task.depth))
+                row_of = {task_id: r for r, (task_id, _depth) in enumerate(self.row_tree)}
+            self.render_task_row(row, task)
+
+        self.apply_collapsed_rows()
+        self.refresh_progress(user_id)
 
 
     def populate_task_table(self, user_id):
-        tasks = db.fetch_tasks(user_id)
+        """Loads the task tree on the read pool; the current rows stay usable meanwhile."""
+        self.loading_label.setText("⏳ Loading roadmap...")
+        self.main_window.reader.request("tasks", db.fetch_task_tree, (user_id,), self.show_task_tree,
+                                        on_error=self.on_task_load_failed)
+
+    def on_task_load_failed(self, error):
+        self.loading_label.setText("")
+        QMessageBox.critical(self, "Error", f"Could not load the roadmap: {error}")
+
+    def show_task_tree(self, tasks):
+        self.loading_label.setText("")
+        self.task_table.clearSelection()
         self.task_table.setRowCount(len(tasks))
+        self.row_tree = [] # (task_id, depth) per row, used to collapse phases without a query
         
         for row_index, task in enumerate(tasks):
-            # Determine the alternating background color for the row
-            row_color = QColor(255, 255, 255) # White (Even rows)
-            if row_index % 2 != 0:
-                row_color = QColor(248, 248, 248) # Light Gray (Odd rows)
-
-            # 1. ID (Hidden)
-            id_item = QTableWidgetItem(str(task['id']))
-            id_item.setBackground(row_color)
-            self.task_table.setItem(row_index, 0, id_item)
+            self.render_task_row(row_index, task)
+            self.row_tree.append((task.id, task.depth))
+
+        self.apply_collapsed_rows()
+
+    def render_task_row(self, row_index, task):
+        """Fills one table row from a TaskRecord (used by full and incremental refreshes)."""
+        # Determine the alternating background color for the row
+        row_color = QColor(255, 255, 255) # White (Even rows)
+        if row_index % 2 != 0:
+            row_color = QColor(248, 248, 248) # Light Gray (Odd rows)
+
+        # 1. ID (Hidden)
+        id_item = QTableWidgetItem(str(task.id))
+        id_item.setBackground(row_color)
+        self.task_table.setItem(row_index, 0, id_item)
             
-            # 2. Skill/Task
-            skill_item = QTableWidgetItem(task['skill'])
-            skill_item.setBackground(row_color)
-            self.task_table.setItem(row_index, 1, skill_item)
-
-            # 3. Deadline (Check for overdue tasks)
-            deadline_str = task['deadline'] if task['deadline'] else "-"
-            deadline_item = QTableWidgetItem(deadline_str)
-            deadline_item.setBackground(row_color)
+        # 2. Skill/Task (indented by depth; phases show their materialized rollup)
+        skill_text = "    " * task.depth + task.skill
+        if task.subtree_total > 1:
+            marker = "▸" if task.id in self.collapsed_task_ids else "▾"
+            skill_text = "    " * task.depth + f"{marker} {task.skill}  ({task.subtree_done}/{task.subtree_total})"
+        skill_item = QTableWidgetItem(skill_text)
+        skill_item.setBackground(row_color)
+        self.task_table.setItem(row_index, 1, skill_item)
+
+        # 3. Deadline (Check for overdue tasks)
+        deadline_str = task.deadline if task.deadline else "-"
+        deadline_item = QTableWidgetItem(deadline_str)
+        deadline_item.setBackground(row_color)
             
-            if deadline_str != "-":
-                from datetime import date
-                try:
-                    task_date = date.fromisoformat(deadline_str)
-                    if task_date < date.today() and task['status'] == 0:
-                        # Override color for overdue tasks only (Foreground/Font)
-                        deadline_item.setForeground(Qt.red)
-                        deadline_item.setFont(QFont('Arial', 10, QFont.Bold))
-                except ValueError:
-                    pass 
+        if deadline_str != "-":
+            from datetime import date
+            try:
+                task_date = date.fromisoformat(deadline_str)
+                if task_date < date.today() and task.status == 0:
+                    # Override color for overdue tasks only (Foreground/Font)
+                    deadline_item.setForeground(Qt.red)
+                    deadline_item.setFont(QFont('Arial', 10, QFont.Bold))
+            except ValueError:
+                pass 
                     
-            self.task_table.setItem(row_index, 2, deadline_item)
+        self.task_table.setItem(row_index, 2, deadline_item)
             
-            # 4. Status
-            status_text = "✅ Done" if task['status'] == 1 else "⏳ Pending"
-            status_item = QTableWidgetItem(status_text)
-            status_item.setBackground(row_color) # Apply row color
-            self.task_table.setItem(row_index, 3, status_item)
-
-            # Apply visual style for done tasks
-            if task['status'] == 1:
-                 skill_item.setForeground(Qt.darkGray)
-                 skill_item.setFont(QFont('Arial', 10, QFont.StyleItalic))
+        # 4. Status
+        status_text = "✅ Done" if task.status == 1 else "⏳ Pending"
+        status_item = QTableWidgetItem(status_text)
+        status_item.setBackground(row_color) # Apply row color
+        self.task_table.setItem(row_index, 3, status_item)
+
+        # Apply visual style for done tasks
+        if task.status == 1:
+             skill_item.setForeground(Qt.darkGray)
+             skill_item.setFont(QFont('Arial', 10, QFont.StyleItalic))
                  
-            # 5. Actions (Button) - Note: setCellWidget handles styling for the action buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(0, 0, 0, 0)
+        # 5. Actions (Button) - Note: setCellWidget handles styling for the action buttons
+        action_widget = QWidget()
+        action_layout = QHBoxLayout(action_widget)
+        action_layout.setContentsMargins(0, 0, 0, 0)
             
-            toggle_btn = QPushButton("Mark Done" if task['status'] == 0 else "Mark Pending")
-            toggle_btn.setFixedSize(100, 25)
-            toggle_btn.clicked.connect(lambda checked, t_id=task['id'], current_status=task['status']: self.toggle_task_status(t_id, current_status))
+        toggle_btn = QPushButton("Mark Done" if task.status == 0 else "Mark Pending")
+        toggle_btn.setFixedSize(100, 25)
+        toggle_btn.clicked.connect(lambda checked, t_id=task.id, current_status=task.status: self.toggle_task_status(t_id, current_status))
             
-            delete_btn = QPushButton("🗑️ Delete")
-            delete_btn.setFixedSize(80, 25)
-            delete_btn.setStyleSheet("QPushButton { background-color: #FF5722; } QPushButton:hover { background-color: #E64A19; }")
-            delete_btn.clicked.connect(lambda checked, t_id=task['id'], t_skill=task['skill']: self.delete_task_item(t_id, t_skill))
+        delete_btn = QPushButton("🗑️ Delete")
+        delete_btn.setFixedSize(80, 25)
+        delete_btn.setStyleSheet("QPushButton { background-color: #FF5722; } QPushButton:hover { background-color: #E64A19; }")
+        delete_btn.clicked.connect(lambda checked, t_id=task.id, t_skill=task.skill: self.delete_task_item(t_id, t_skill))
+
+        action_layout.addWidget(toggle_btn)
+        action_layout.addWidget(delete_btn)
+        self.task_table.setCellWidget(row_index, 4, action_widget)
+
+    def toggle_collapse(self, row, column):
+        """Double-clicking a phase hides/shows its subtasks (no database access)."""
+        task_id, depth = self.row_tree[row]
+        if row + 1 >= len(self.row_tree) or self.row_tree[row + 1][1] <= depth:
+            return # Leaf task
+        if task_id in self.collapsed_task_ids:
+            self.collapsed_task_ids.discard(task_id)
+        else:
+            self.collapsed_task_ids.add(task_id)
+        item = self.task_table.item(row, 1)
+        item.setText(item.text().replace("▾", "▸", 1) if task_id in self.collapsed_task_ids
+                     else item.text().replace("▸", "▾", 1))
+        self.apply_collapsed_rows()
 
-            action_layout.addWidget(toggle_btn)
-            action_layout.addWidget(delete_btn)
-            self.task_table.setCellWidget(row_index, 4, action_widget)
+    def apply_collapsed_rows(self):
+        hidden_below = None # depth of the collapsed ancestor currently hiding rows
+        for row, (task_id, depth) in enumerate(self.row_tree):
+            if hidden_below is not None and depth <= hidden_below:
+                hidden_below = None
+            self.task_table.setRowHidden(row, hidden_below is not None)
+            if hidden_below is None and task_id in self.collapsed_task_ids:
+                hidden_below = depth
 
 
     def toggle_task_status(self, task_id, current_status):
         new_status = 1 if current_status == 0 else 0
-        db.update_task_status(task_id, new_status)
-        
-        if new_status == 1:
-            progress, done, total = logic.calculate_progress(self.main_window.current_user_id)
-            streak_data = db.get_progress_data(self.main_window.current_user_id)
-            current_streak = streak_data['streak_days'] if streak_data else 0
-
-            rewards = logic.check_for_rewards(self.main_window.current_user_id, current_streak, progress)
-            
-            if rewards:
-                QMessageBox.information(self, "✨ Reward Unlocked! ✨", 
-                                        "\n".join(rewards) + "\n\nCongratulations on your achievement!")
-            
-        self.update_dashboard()
+        # Queued on the writer thread; the dashboard refreshes once the batch commits
+        db.submit_write("update_task_status", task_id, new_status)
         
     def delete_task_item(self, task_id, task_skill):
         reply = QMessageBox.question(self, 'Delete Task', 
-                                     f"Are you sure you want to delete '{task_skill}'?", 
+                                     f"Are you sure you want to delete '{task_skill}' (and any subtasks)?", 
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            db.delete_task(task_id)
-            self.update_dashboard()
+            db.submit_write("delete_task", task_id)
+
+    # --- Bulk Actions (multi-row selection) ---
+
+    def selected_task_ids(self):
+        rows = self.task_table.selectionModel().selectedRows()
+        return [int(self.task_table.item(index.row(), 0).text()) for index in rows]
+
+    def on_selection_changed(self):
+        count = len(self.task_table.selectionModel().selectedRows())
+        self.selection_label.setText(f"Selected: {count}")
+        for btn in self.bulk_buttons:
+            btn.setEnabled(count > 0)
+
+    def bulk_set_status(self, status):
+        task_ids = self.selected_task_ids()
+        if task_ids:
+            db.submit_write("update_tasks_status", task_ids, status)
+
+    def bulk_reschedule(self):
+        task_ids = self.selected_task_ids()
+        if not task_ids:
+            return
+        new_deadline, ok = QInputDialog.getText(self, 'Reschedule Tasks',
+                                                f'New deadline for {len(task_ids)} task(s) (YYYY-MM-DD, empty to clear):',
+                                                QLineEdit.Normal)
+        if not ok:
+            return
+        new_deadline = new_deadline.strip()
+        if new_deadline:
+            from datetime import date
+            try:
+                date.fromisoformat(new_deadline)
+            except ValueError:
+                QMessageBox.warning(self, "Error", "Invalid deadline format. Please use YYYY-MM-DD.")
+                return
+        db.submit_write("reschedule_tasks", task_ids, new_deadline or None)
+
+    def bulk_delete(self):
+        task_ids = self.selected_task_ids()
+        if not task_ids:
+            return
+        reply = QMessageBox.question(self, 'Delete Tasks',
+                                     f"Are you sure you want to delete {len(task_ids)} selected task(s)?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            db.submit_write("delete_tasks", task_ids)
+
+    def on_writes_committed(self, batch, errors):
+        """Refreshes once per committed batch instead of once per click."""
+        if errors:
+            details = "\n".join(f"{op}: {e}" for op, args, e in errors)
+            QMessageBox.warning(self, "Save Error", f"Some changes could not be saved:\n{details}")
+
+        if self.main_window.current_user_id is None:
+            return
+        if all(op in DASHBOARD_BOOKKEEPING_WRITES for op, _args in batch):
+            return # Already shown by the load that queued them
+
+        # Newly crossed milestones are announced by update_dashboard()
+        self.update_dashboard()
+
+    def show_burndown(self):
+        dialog = BurndownDialog(self.main_window.current_user_id, self)
+        dialog.exec_()
+
+    def show_reviews(self):
+        dialog = ReviewDialog(self.main_window.current_user_id, self.main_window.reader, self)
+        dialog.exec_()
+        self.refresh_progress(self.main_window.current_user_id)
 
     def show_add_task_popup(self):
-        popup = AddTaskPopup(self.main_window.current_user_id, self.update_dashboard)
+        # With exactly one row selected, the new task becomes its subtask
+        selected = self.selected_task_ids()
+        parent_id = selected[0] if len(selected) == 1 else None
+        parent_name = None
+        if parent_id is not None:
+            parent_name = self.task_table.item(self.task_table.selectionModel().selectedRows()[0].row(), 1).text().strip()
+        popup = AddTaskPopup(self.main_window.current_user_id, parent_id, parent_name)
         popup.exec_()
         
     def handle_import_roadmap(self):
@@ -466,15 +1080,19 @@ class DashboardScreen(QWidget):
 
         # 2. Open file dialog for selection
         filePath, _ = QFileDialog.getOpenFileName(self, "Open Roadmap File", "", 
-                                                  "Text Files (*.txt);;PDF Files (*.pdf)")
+                                                  "Roadmap Files (*.txt *.md *.json *.csv *.pdf);;Text Files (*.txt);;"
+                                                  "Markdown Outlines (*.md);;JSON Outlines (*.json);;CSV Outlines (*.csv);;PDF Files (*.pdf)")
         if not filePath:
             return
 
         content = ""
+        fmt = "text"
         try:
-            if filePath.lower().endswith('.txt'):
+            if filePath.lower().endswith(('.txt', '.md', '.json', '.csv')):
                 with open(filePath, 'r', encoding='utf-8') as f:
                     content = f.read()
+                if filePath.lower().endswith(('.json', '.csv')):
+                    fmt = filePath.lower().rsplit('.', 1)[1]
             elif filePath.lower().endswith('.pdf'):
                 with open(filePath, 'rb') as f:
                     reader = pypdf.PdfReader(f)
@@ -484,7 +1102,7 @@ class DashboardScreen(QWidget):
                     content = "\n".join(full_text)
             
             # 3. Process and schedule
-            num_tasks = logic.process_imported_roadmap(self.main_window.current_user_id, content, overall_deadline)
+            num_tasks = logic.process_imported_roadmap(self.main_window.current_user_id, content, overall_deadline, fmt)
             QMessageBox.information(self, "Success", f"{num_tasks} tasks imported and scheduled day-wise until {overall_deadline}!")
             self.update_dashboard() 
             
@@ -493,6 +1111,67 @@ class DashboardScreen(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "File Error", f"Failed to read or process file: {e}")
 
+    # --- Backup / Export / Import (background threads) ---
+
+    def run_in_background(self, job_name, func, *args):
+        """Runs func(*args) off the GUI thread and reports back through job_signals."""
+        def run():
+            try:
+                result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+            self.job_signals.finished.emit(job_name, result, error)
+        threading.Thread(target=run, name=f"{job_name}Thread", daemon=True).start()
+
+    def handle_backup(self):
+        dest_path, _ = QFileDialog.getSaveFileName(self, "Save Backup", backup.default_backup_path(),
+                                                   "SQLite Database (*.db)")
+        if dest_path:
+            self.backup_btn.setEnabled(False)
+            self.run_in_background("Backup", backup.backup_database, dest_path)
+
+    def handle_export_data(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Roadmap", "roadmap_export.jsonl",
+                                              "JSON Lines (*.jsonl);;CSV Files (*.csv)")
+        if path:
+            self.export_btn.setEnabled(False)
+            self.run_in_background("Export", backup.export_user_data, self.main_window.current_user_id, path)
+
+    def handle_import_data(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Roadmap Data", "",
+                                              "JSON Lines (*.jsonl);;CSV Files (*.csv)")
+        if path:
+            self.import_data_btn.setEnabled(False)
+            self.run_in_background("Import", backup.import_user_data, self.main_window.current_user_id, path)
+
+    def handle_sync(self):
+        server_url, ok = QInputDialog.getText(self, 'Sync Devices', 'Sync server URL:',
+                                              QLineEdit.Normal, self.sync_server_url)
+        if not ok or not server_url.strip():
+            return
+        self.sync_server_url = server_url.strip()
+        self.sync_btn.setEnabled(False)
+        self.run_in_background("Sync", sync.sync_user, self.main_window.current_user_id, self.sync_server_url)
+
+    def on_background_job_finished(self, job_name, result, error):
+        for btn in (self.backup_btn, self.export_btn, self.import_data_btn, self.sync_btn):
+            btn.setEnabled(True)
+
+        if error:
+            QMessageBox.critical(self, f"{job_name} Error", f"{job_name} failed: {error}")
+        elif job_name == "Backup":
+            QMessageBox.information(self, "Success", f"Backup saved to {result}.")
+        elif job_name == "Export":
+            QMessageBox.information(self, "Success", f"{result} tasks exported.")
+        elif job_name == "Import":
+            QMessageBox.information(self, "Success", f"{result} tasks imported.")
+            self.update_dashboard()
+        elif job_name == "Sync":
+            pushed, pulled = result
+            QMessageBox.information(self, "Sync Complete", f"Sent {pushed} change(s), received {pulled} change(s).")
+            if pulled:
+                self.update_dashboard()
+
     def show_motivational_popup(self, title, message):
         msg = QMessageBox()
         msg.setIcon(QMessageBox.Information)
@@ -516,10 +1195,10 @@ class DashboardScreen(QWidget):
 
 class AddTaskPopup(QMessageBox):
     """Simple modal popup to add a new task."""
-    def __init__(self, user_id, refresh_callback):
+    def __init__(self, user_id, parent_id=None, parent_name=None):
         super().__init__()
         self.user_id = user_id
-        self.refresh_callback = refresh_callback
+        self.parent_id = parent_id
         self.setWindowTitle("Add New Roadmap Task")
         self.setStyleSheet(STUDENT_THEME_QSS) 
         
@@ -542,6 +1221,8 @@ class AddTaskPopup(QMessageBox):
         vbox.addWidget(self.desc_input)
         vbox.addWidget(QLabel("Deadline:"))
         vbox.addWidget(self.deadline_input)
+        if parent_name:
+            vbox.addWidget(QLabel(f"Subtask of: {parent_name}"))
         
         # Replace default content of QMessageBox with custom widget
         layout = self.layout()
@@ -576,8 +1257,7 @@ class AddTaskPopup(QMessageBox):
             task_deadline = self.deadline_input.text().strip()
             
             if task_name:
-                db.add_task(self.user_id, task_name, task_desc, task_deadline if task_deadline else None)
-                self.refresh_callback() 
+                db.submit_write("add_task", self.user_id, task_name, task_desc, task_deadline if task_deadline else None, self.parent_id)
                 QMessageBox.information(self, "Success", f"Task '{task_name}' added!")
             else:
                 QMessageBox.warning(self, "Error", "Task name cannot be empty.")
@@ -607,17 +1287,59 @@ class MainApplication(QMainWindow):
         self.central_widget = QStackedWidget()
         self.setCentralWidget(self.central_widget)
 
+        # Screens read through a small pool of database threads, so the window never waits on SQLite
+        db.start_read_pool()
+        self.reader = AsyncReader(self)
+
         self.login_screen = LoginScreen(self)
         self.dashboard_screen = DashboardScreen(self)
         
         self.central_widget.addWidget(self.login_screen)
         self.central_widget.addWidget(self.dashboard_screen)
         
-        logic.set_reminder_display_callback(self.dashboard_screen.show_reminder_popup)
+        # Reminders fire on the scheduler thread; the popup is shown on the GUI thread
+        self.reminder_signals = ReminderSignals()
+        self.reminder_signals.reminder_due.connect(self.dashboard_screen.show_reminder_popup)
+        logic.set_reminder_display_callback(self.reminder_signals.reminder_due.emit)
+
+        # Mutations are applied by a single writer thread and confirmed via signal
+        self.write_signals = DatabaseWriteSignals()
+        self.write_signals.writes_committed.connect(self.dashboard_screen.on_writes_committed)
+        db.start_writer(on_commit=self.write_signals.writes_committed.emit)
+
+        # Online backup copies a few pages per step, so active sessions never freeze
+        logic.schedule_nightly_backup("02:00")
+
+        # Any key press, click or scroll pushes idle-time maintenance back
+        self.last_maintenance = None
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(IDLE_MAINTENANCE_DELAY_MS)
+        self.idle_timer.timeout.connect(self.run_idle_maintenance)
+        self.app.installEventFilter(self)
+        self.idle_timer.start()
 
         self.switch_to_login()
+
+    def eventFilter(self, obj, event):
+        if event.type() in USER_INPUT_EVENTS:
+            self.idle_timer.start()
+        return super().eventFilter(obj, event)
+
+    def run_idle_maintenance(self):
+        now = time.monotonic()
+        if self.last_maintenance is not None and now - self.last_maintenance < MAINTENANCE_MIN_INTERVAL_S:
+            return
+        # Runs on its own thread; archived rows leave the table through the change watcher
+        if logic.start_idle_maintenance():
+            self.last_maintenance = now
         
     def switch_to_login(self):
+        # Badges found by loads still in flight for the previous user are not announced after logout
+        self.current_user_id = None
+        self.current_user_name = None
+        self.current_user_goal = None
+        self.dashboard_screen.last_progress = (None, None)
         self.central_widget.setCurrentWidget(self.login_screen)
         
     def switch_to_dashboard(self):
@@ -625,4 +1347,13 @@ class MainApplication(QMainWindow):
             self.dashboard_screen.update_dashboard()
             self.central_widget.setCurrentWidget(self.dashboard_screen)
         else:
-            self.switch_to_login()
\ No newline at end of file
+            self.switch_to_login()
+
+    def closeEvent(self, event):
+        self.idle_timer.stop()
+        # Flush queued mutations before the process exits
+        db.stop_writer()
+        db.stop_read_pool()
+        if self.dashboard_screen.change_watcher is not None:
+            self.dashboard_screen.change_watcher.close()
+        super().closeEvent(event)